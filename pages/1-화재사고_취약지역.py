@@ -1,18 +1,18 @@
 # -*- coding:utf-8 -*-
 import streamlit as st
 # utils 패키지 내 필요한 함수들을 import
-from utils.data_loader import load_data
-from utils.visualizations import visualize_vertical_bar_chart, visualize_top_districts_with_seoul_average
+from utils.datasets import dataset
+from utils.visualizations import visualize_vertical_bar_chart, visualize_top_districts_with_seoul_average, visualize_rank_sensitivity
 from utils.map_visualization import create_and_show_map
-from utils.ui_helpers import setup_sidebar_links
-import geopandas as gpd
+from utils.ui_helpers import setup_sidebar_links, select_indicator_weights
+from utils.scoring import score_districts, weight_sensitivity
 
 # 스트림릿 페이지 설정
 st.set_page_config(layout="wide", initial_sidebar_state="expanded", page_icon='⚠️')
 
-# 데이터 로드
-df = load_data("data/total_rank.csv", encoding='cp949')
-gdf = gpd.read_file("data/boundary/boundary.geojson")
+# 데이터 로드 (차트 캐시에는 (경로, 내용 버전, 열 선택) 핸들을 넘김)
+rank_data = dataset("data/total_rank.csv", encoding='cp949')
+df = rank_data.frame()
 # 사이드바 링크 설정
 setup_sidebar_links()
 
@@ -22,16 +22,12 @@ columns_to_exclude = ["비상소화장치 설치개수 점수", "서울시 주
                           "출동소요시간 점수", "순위", "전체 점수", "고령자 수 점수"]
     
 # 점수 열들을 제외하고 데이터 프레임 재구성
-df_09 = df[[col for col in df.columns if col not in columns_to_exclude]]
+data_09 = rank_data.select([col for col in df.columns if col not in columns_to_exclude])
     
 # 열이름 변경('서울시 주거 시설 중 주택 비율' -> '주택 중 아파트를 제외한 건물 비율')
-df_09 = df_09.rename(columns={'서울시 주거 시설 중 주택 비율': '주택 중 아파트를 제외한 건물 비율'})
-    
-# '순위'와 '전체 점수' 열만 포함하고, '순위' 기준으로 오름차순 정렬한 새로운 데이터 프레임 생성
-df_3 = df[['자치구', '순위', '전체 점수']].sort_values(by='순위', ascending=True)
-    
-# GeoDataFrame과 기존 DataFrame을 합치기 위해 '구'열과 '자치구' 열을 기준으로 병합
-merged_data = gdf.merge(df, left_on='구', right_on='자치구')
+data_09 = data_09.rename({'서울시 주거 시설 중 주택 비율': '주택 중 아파트를 제외한 건물 비율'})
+df_09 = data_09.frame()
+
 
 def main():
 
@@ -53,7 +49,7 @@ def main():
             selected_column = st.selectbox('분석 카테고리 선택', options=df_09.columns[1:], index=0, key='_selected_data_1')
             
             # 선택한 카테고리에 따라 막대 차트 시각화
-            visualize_vertical_bar_chart(df_09, selected_column, title=f"서울시 자치구별 {selected_column} 분석")
+            visualize_vertical_bar_chart(data_09, selected_column, title=f"서울시 자치구별 {selected_column} 분석")
 
         with tab2: # 탭 2 - 상/하위 5개구만 보기
             visualize_top_districts_with_seoul_average(df_09)
@@ -79,19 +75,48 @@ def main():
                     각 카테고리별로 지역의 취약성을 분석하여 순위를 매긴 뒤,
                     모든 카테고리의 순위를 합산하여 최종 점수를 산출했습니다.
                     :orange[**점수가 높을수록 소방 취약지역입니다.**]
+                    **가중치 조정**에서 카테고리별 가중치와 방향을 바꾸면 순위에 가중치를 곱해 합산한 점수로 다시 계산합니다.
                         
                     **카테고리**: 비상소화장치 설치개수, 주택 중 아파트를 제외한 건물 비율,	인구밀도(명/km^2),	노후 주택 수, 소방관 1명당 담당인구, 화재발생건수, 안전센터 1개소당 담당인구, 출동소요시간, 고령자 수
                 """)
 
+            # 지표별 가중치와 방향 조정 (기본값은 모든 지표 가중치 1, 순위 합산과 같음)
+            with st.popover("⚖️ **가중치 조정**"):
+                weights, directions = select_indicator_weights()
+
+            # 지표 원자료에서 순위와 전체 점수를 다시 계산 (가중치 조합마다 캐시)
+            scored = score_districts(weights, directions)
+
             # 취약지역 점수 지도 시각화
-            html_string = create_and_show_map(_data=merged_data, columns=['자치구', '전체 점수'], key_on='feature.properties.자치구')
+            # (구 경계는 지도 줌 레벨에 맞게 미리 단순화된 경계를 사용)
+            html_string = create_and_show_map(_data=scored, columns=['자치구', '전체 점수'], key_on='feature.properties.자치구')
             st.components.v1.html(html_string, height=570)
 
     with col2: # 열 2 - 취약점수 순위와 점수를 보여주는 데이터 프레임 섹션
         
         with st.container(border=True, height=700): 
             st.markdown("**취약점수 순위**")
+            df_3 = scored[['자치구', '순위', '전체 점수']].sort_values(by='순위', ascending=True)
             st.dataframe(df_3, height=600, use_container_width=True, hide_index=True)
 
+    # 가중치 민감도 분석: 가중치를 무작위로 바꿔도 순위가 유지되는지 확인
+    with st.container(border=True, height=800):
+        st.markdown('<h4>가중치 민감도 분석</h4>', unsafe_allow_html=True)
+        st.caption('디리클레 분포에서 뽑은 가중치 조합마다 전체 순위를 다시 계산하여, 자치구별 순위 분포와 상위 5위 안에 들 확률을 보여줍니다. 지표 방향은 가중치 조정의 선택을 따릅니다.')
+
+        col_samples, col_concentration = st.columns(2)
+        with col_samples:
+            n_samples = st.select_slider('가중치 표본 수', options=[1000, 5000, 10000, 20000, 50000], value=20000, key='sensitivity_samples')
+        with col_concentration:
+            concentration = st.slider('집중도', 0.2, 5.0, 1.0, step=0.2, key='sensitivity_concentration',
+                                      help='클수록 가중치가 균등(모든 지표 1/9)에 가깝게, 작을수록 일부 지표에 치우치게 뽑힙니다.')
+
+        summary = weight_sensitivity(n_samples, concentration, directions)
+        col_chart, col_table = st.columns([6, 4])
+        with col_chart:
+            visualize_rank_sensitivity(summary)
+        with col_table:
+            st.dataframe(summary, height=600, use_container_width=True, hide_index=True)
+
 if __name__ == "__main__":
     main()
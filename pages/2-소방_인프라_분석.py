@@ -1,12 +1,20 @@
 # -*- coding:utf-8 -*-
 import streamlit as st
-import geopandas as gpd
-from streamlit_folium import folium_static
-from shapely import wkt
+import pandas as pd
+from streamlit_folium import st_folium
 # utils 패키지 내 필요한 함수들을 import
-from utils.data_loader import load_data
-from utils.map_visualization import display_fire_incidents_map, create_folium_map, display_folium_map_with_clusters, visualize_fire_water
-from utils.ui_helpers import setup_sidebar_links, display_season_colors, create_html_button
+from utils.datasets import dataset
+from utils.map_visualization import display_fire_incidents_map, create_folium_map, display_folium_map_with_clusters, visualize_fire_water, visualize_device_coverage, visualize_travel_time, visualize_nearest_lookup
+from utils.map_cache import show_map
+from utils.incidents import build_incident_index
+from utils.spatial import build_facility_index, nearest_station_summary
+from utils.coverage import area_coverage
+from utils.hotspot import grid_hotspot, HOTSPOT_WEIGHTS
+from utils.binning import RESOLUTIONS, SHAPES
+from utils.isochrone import band_shares, calibrated_speed
+from utils.simulator import build_simulation_base, StationSimulator
+from utils.nearest_service import build_nearest_service, parse_points, LAYERS, MAX_K
+from utils.ui_helpers import setup_sidebar_links, display_season_colors, create_html_button, select_cluster_zoom, lazy_tabs
 
 # 페이지 설정
 st.set_page_config(layout="wide", initial_sidebar_state="expanded", page_icon='🚒')
@@ -14,16 +22,26 @@ st.set_page_config(layout="wide", initial_sidebar_state="expanded", page_icon='
 # 사이드바 설정
 setup_sidebar_links()
 
-# 데이터 로드
-data = load_data("data/서울시_비상소화장치_좌표_구동.csv")
-grid = load_data("data/seoul_500_grid_water.csv", encoding='euc-kr')
-df = load_data("data/서울시_소방시설_좌표_구동.csv")
-time = load_data("data/화재출동_골든타임.csv")
+# 데이터 로드 (지리 데이터는 프로세스당 한 번 파싱된 GeoDataFrame을 공유)
+# 지도 캐시에는 데이터프레임 대신 (경로, 내용 버전, 필터) 핸들을 넘겨서 키 계산 비용을 없앰
+facilities = dataset("data/서울시_소방시설_좌표_구동.csv")
+grid_data = dataset("data/seoul_500_grid_water.csv", kind='geo')
+devices = dataset("data/서울시_비상소화장치_좌표_구동.csv", kind='geo')
+incident_data = dataset("data/화재출동_골든타임.csv", kind='incidents')
 
-# `data['geometry']` 열에 저장된 WKT(Well-Known Text) 포맷의 지리적 데이터를 
-# Shapely 라이브러리의 `loads` 함수를 사용하여 Point 객체로 변환
-data['geometry'] = data['geometry'].apply(wkt.loads)  
-_gdf = gpd.GeoDataFrame(data, geometry='geometry') # GeoDataFrame으로 변환
+_gdf = devices.frame()
+grid = grid_data.frame()
+# 격자로 계산하는 캐시(표본점 거리, 밀도 격자, 이동 시간 래스터)의 키 - 격자 파일 내용이 바뀌면 달라짐
+grid_key = grid_data.cache_key()
+df = facilities.frame()
+# 화재 출동 기록은 발생일시로 정렬하고 범주 코드를 만든 인덱스로 한 번만 준비
+incidents = build_incident_index("data/화재출동_골든타임.csv")
+
+# 소방서/안전센터 BallTree 인덱스 (출동 지점별 최근접 시설 거리/방위 계산)
+stations = build_facility_index("data/서울시_소방시설_좌표_구동.csv")
+
+# 좌표 조회 지도에 표시할 최대 지점 수
+MAP_POINTS = 200
 
 def main():
     # 메인 헤더
@@ -38,10 +56,10 @@ def main():
             # 부제목
             st.markdown('<h4>서울시 소방 인프라 위치 시각화</h4>', unsafe_allow_html=True) 
 
-            # 3개의 탭 생성
-            tab1, tab2, tab3 = st.tabs(["소방서 및 안전센터", "비상 소화장치", "소방용수"])
+            # 5개의 탭 생성 (선택한 탭의 지도만 만들어 전송)
+            selected_tab = lazy_tabs(["소방서 및 안전센터", "비상 소화장치", "소방용수", "비상 소화장치 커버리지", "출동 도달 시간"], key='infra_tab')
 
-            with tab1: # 탭 1 - 소방서 및 안전센터
+            if selected_tab == "소방서 및 안전센터": # 탭 1 - 소방서 및 안전센터
                 # 선택된 구에 따라 동 선택
                 # '서울시'를 추가한 구 선택
                 gu_options = ['서울시'] + sorted(df['구'].unique().tolist())
@@ -54,7 +72,7 @@ def main():
 
                 # 선택된 구에 따라 동 선택 옵션을 업데이트
                 if selected_gu == '서울시':
-                    filtered_df = df
+                    view = facilities
                 else:
                     with col_dong:
                         # '구 전체' 옵션을 동 선택기에 추가
@@ -62,14 +80,14 @@ def main():
                         selected_dong = st.selectbox('동 선택', dong_options, index=0)
 
                         if selected_dong == f'{selected_gu} 전체':
-                            filtered_df = df[df['구'] == selected_gu]
+                            view = facilities.where(구=selected_gu)
                         else:
-                            filtered_df = df[(df['구'] == selected_gu) & (df['동'] == selected_dong)]
+                            view = facilities.where(구=selected_gu, 동=selected_dong)
 
-                # 지도 시각화 함수에 필터링된 데이터프레임을 전달
-                create_folium_map(filtered_df)
+                # 지도 시각화 함수에 구/동 조건을 담은 핸들을 전달 (같은 필터의 지도는 캐시된 HTML 사용)
+                show_map(create_folium_map(view))
 
-            with tab2: # 탭 2 - 비상 위치 소화장치 클러스터링 시각화
+            elif selected_tab == "비상 소화장치": # 탭 2 - 비상 위치 소화장치 클러스터링 시각화
                 # '서울시'를 추가한 구 선택 옵션 생성
                 sig_options = ['서울시'] + sorted(_gdf['구'].unique().tolist())
 
@@ -81,20 +99,23 @@ def main():
 
                 # 선택된 구에 따라 동 선택 옵션을 업데이트합니다.
                 if selected_sig == '서울시':
-                    filtered_gdf = _gdf
+                    device_view = devices
                 else:
                     with col2_emd:
                         emd_options = [f'{selected_sig} 전체'] + sorted(_gdf[_gdf['구'] == selected_sig]['동'].unique().tolist())
                         selected_emd = st.selectbox('동 선택:', emd_options, index=0)
 
                     if selected_emd == f'{selected_sig} 전체':
-                        filtered_gdf = _gdf[_gdf['구'] == selected_sig]
+                        device_view = devices.where(구=selected_sig)
                     else:
-                        filtered_gdf = _gdf[(_gdf['구'] == selected_sig) & (_gdf['동'] == selected_emd)]
+                        device_view = devices.where(구=selected_sig, 동=selected_emd)
 
-                display_folium_map_with_clusters(filtered_gdf)
+                # 표시 방식 선택 (줌 레벨별 집계는 서버에서 집계한 클러스터만 전송)
+                # 지도 캐시에는 구/동 조건을 담은 핸들을 넘겨서 geometry를 매번 해시하지 않음
+                zoom = select_cluster_zoom('device_map')
+                show_map(display_folium_map_with_clusters(device_view, zoom=zoom))
 
-            with tab3: # 탭 3 - 소방용수 분포
+            elif selected_tab == "소방용수": # 탭 3 - 소방용수 분포
 
                 # 시각화 기준 설명
                 with st.popover("💡 **시각화 기준 설명**"):
@@ -105,8 +126,101 @@ def main():
                     소방용수 밀집 지역**: 일부 지역에서는 소방용수 점의 수가 100개를 넘는 경우도 있으며, 이는 해당 지역의 소방 안전 인프라가 잘 갖추어져 있음을 나타냅니다.
                     """)
 
-                # 소방용수 분포 시각화
-                visualize_fire_water(grid, column_name='소방용수_수')
+                # 격자 다시 집계 설정 (원본 500m 격자 대신 100m~2km 사각/육각 격자)
+                with st.popover("🧮 **격자 설정**"):
+                    rebin = st.toggle('격자 다시 집계', key='rebin_on')
+                    source = st.selectbox('집계 대상', ['소방용수', '비상소화장치'], key='rebin_source', disabled=not rebin,
+                                          help='소방용수는 개별 위치 자료가 없어 500m 격자 중심에 셀의 소방용수 수를 둔 점으로 다시 집계합니다.')
+                    shape = st.radio('격자 모양', list(SHAPES), horizontal=True, key='rebin_shape', disabled=not rebin)
+                    resolution = st.select_slider('격자 크기(m)', options=RESOLUTIONS, value=500, key='rebin_resolution', disabled=not rebin)
+
+                # 화재 핫스팟(출동 기록 커널 밀도) 레이어 설정
+                col_show, col_bandwidth, col_weight = st.columns([2, 3, 2])
+                with col_show:
+                    show_hotspot = st.toggle('화재 핫스팟 함께 보기', key='hotspot_on')
+                with col_bandwidth:
+                    bandwidth = st.slider('대역폭(m)', 250, 2000, 500, step=250, key='hotspot_bandwidth', disabled=not show_hotspot)
+                with col_weight:
+                    weight = st.selectbox('가중치', list(HOTSPOT_WEIGHTS), key='hotspot_weight', disabled=not show_hotspot)
+
+                # 핫스팟에 넣을 출동 기록의 계절/시간대 (모두 선택하면 필터 없이 전체 기록 사용)
+                col_season, col_time = st.columns(2)
+                with col_season:
+                    hotspot_seasons = st.multiselect('계절', incidents.categories['계절'], default=incidents.categories['계절'],
+                                                     key='hotspot_seasons', disabled=not show_hotspot)
+                with col_time:
+                    hotspot_times = st.multiselect('시간대', incidents.categories['시간대'], default=incidents.categories['시간대'],
+                                                   key='hotspot_times', disabled=not show_hotspot)
+                season_filter = None if len(hotspot_seasons) == len(incidents.categories['계절']) else tuple(hotspot_seasons)
+                time_filter = None if len(hotspot_times) == len(incidents.categories['시간대']) else tuple(hotspot_times)
+                hotspot = grid_hotspot(grid, grid_key, bandwidth, weight, season_filter, time_filter) if show_hotspot else None
+
+                # 소방용수 분포 시각화 (격자를 PNG 이미지 오버레이로 표시)
+                if rebin:
+                    show_map(visualize_fire_water(grid_data, column_name='소방용수_수', raster=True, hotspot=hotspot,
+                                                  resolution=resolution, shape=SHAPES[shape], source=source), height=450)
+                else:
+                    show_map(visualize_fire_water(grid_data, column_name='소방용수_수', raster=True, hotspot=hotspot), height=450)
+
+            elif selected_tab == "비상 소화장치 커버리지": # 탭 4 - 비상 소화장치 커버리지 (서비스 반경 밖 지역 확인)
+                col_radius, col_level = st.columns([3, 1])
+                with col_radius:
+                    radius = st.slider('서비스 반경(m)', min_value=100, max_value=1000, value=300, step=50, key='coverage_radius')
+                with col_level:
+                    level = st.selectbox('집계 단위', ['구', '동'], key='coverage_level',
+                                         help='동 경계 자료가 없어 동별 값은 가장 가까운 비상소화장치의 동으로 근사합니다.')
+
+                # 격자 셀별 반경 내 면적 비율 (표본점 거리는 한 번만 계산, 반경이 바뀌면 집계만 다시 함)
+                show_map(visualize_device_coverage(grid_data, radius), height=450)
+
+                # 반경 내 면적 비율이 낮은 순으로 정렬한 구/동별 요약
+                with st.expander(f"📋 **{level}별 비상소화장치 커버리지**"):
+                    st.dataframe(area_coverage(grid, grid_key, radius, level), use_container_width=True)
+
+            else: # 탭 5 - 소방서/안전센터에서 격자 셀까지의 도달 시간 (운영 중지/신규 시설 가정 비교)
+                col_speed, col_closed = st.columns([2, 3])
+                with col_speed:
+                    speed = st.slider('평균 주행 속도(km/h)', 5.0, 40.0, round(calibrated_speed(), 1), step=0.5, key='travel_speed',
+                                      help='기본값은 출동 기록(최근접 시설까지 직선거리 / 출동소요시간)으로 보정한 값입니다. '
+                                           '기록이 골든타임 초과 출동뿐이라 실제보다 느린 쪽으로 치우쳐 있습니다.')
+                with col_closed:
+                    closed = st.multiselect('운영 중지 가정 시설', sorted(stations.facilities['서ㆍ센터명'].unique()), key='travel_closed')
+
+                # 지도를 클릭해서 추가한 신규 안전센터 {이름: (위도, 경도)}
+                added = st.session_state.setdefault('travel_added', {})
+                if added and st.button(f'추가한 시설 {len(added)}곳 지우기', key='travel_clear'):
+                    added.clear()
+
+                # 세션별 시뮬레이터: 시설별 도달 시간 행렬은 속도마다 한 번 계산해서 공유하고,
+                # 선택이 바뀌면 가장 가까운 시설이 바뀐 노드만 다시 계산
+                base = build_simulation_base(grid, grid_key, speed)
+                simulator = st.session_state.get('travel_simulator')
+                if simulator is None or simulator.base is not base:
+                    simulator = st.session_state['travel_simulator'] = StationSimulator(base)
+                simulator.sync(closed, added)
+                minutes = pd.Series(simulator.grid_minutes(), index=grid.index)
+
+                st.caption('지도를 클릭하면 그 위치에 신규 안전센터를 추가합니다.')
+                output = st_folium(visualize_travel_time(grid_data, minutes, stations.facilities, tuple(closed), added),
+                                   width=700, height=450, returned_objects=['last_clicked'], key='travel_map')
+                click = (output or {}).get('last_clicked')
+                if click and click != st.session_state.get('travel_last_click'):
+                    st.session_state['travel_last_click'] = click
+                    added[f"신규 안전센터 ({click['lat']:.4f}, {click['lng']:.4f})"] = (click['lat'], click['lng'])
+                    st.rerun()
+
+                # 도달 시간 구간별 면적 비율 (운영 중지/신규 시설이 있으면 현재와 비교)
+                shares = band_shares(grid, minutes).to_frame('면적 비율(%)')
+                if closed or added:
+                    shares.insert(0, '현재(%)', band_shares(grid, pd.Series(simulator.grid_minutes(baseline=True), index=grid.index)))
+                    shares.columns = ['현재(%)', '변경 후(%)']
+                st.dataframe(shares.T, use_container_width=True)
+
+                # 자치구별 인구 가중 7분 커버리지와 취약점수 지표(안전센터 1개소당 담당인구, 출동소요시간)의 변화
+                with st.expander("📋 **자치구별 커버리지와 지표 변화**", expanded=bool(closed or added)):
+                    st.caption('자치구 인구(안전센터 1개소당 담당인구 x 안전센터 수)를 구 면적에 고르게 나눠 가중합니다. '
+                               '출동소요시간은 관측값에 평균 도달 시간의 변화를 더한 근사값입니다.')
+                    st.dataframe(simulator.summary(), use_container_width=True, hide_index=True)
     
     with col2:  # 열 2 - 소방 복지 및 정책
 
@@ -142,9 +256,65 @@ def main():
 
             # 계절에 따른 골든타임 마커 색상 정보
             display_season_colors()
+
+            # 기간, 계절, 시간대 필터
+            first_day, last_day = incidents.date_range
+            period = st.date_input("기간", value=(first_day, last_day), min_value=first_day, max_value=last_day,
+                                   format="YYYY-MM-DD", key='incident_period')
+            start, end = period if len(period) == 2 else (period[0], period[0])
+            seasons = st.multiselect("계절", incidents.categories['계절'], default=incidents.categories['계절'], key='incident_season')
+            times = st.multiselect("시간대", incidents.categories['시간대'], default=incidents.categories['시간대'], key='incident_time')
+            incident_view = incident_data.where(start=start, end=end, 계절=seasons, 시간대=times)
+            time = stations.annotate(incident_view.frame())
+            st.caption(f"선택한 조건의 출동 기록: {len(time):,}건")
+
+            # 표시 방식 선택
+            zoom = select_cluster_zoom('incident_map')
             
         with col2: # 열 2 - 화재 출동 골든타임 초과한 사건 지도 시각화           
-            display_fire_incidents_map(time)
+            show_map(display_fire_incidents_map(incident_view, zoom=zoom), width=800)
+
+            # 자치구별 가장 가까운 소방서/안전센터까지의 거리 요약
+            with st.expander("🚒 **자치구별 최근접 소방서·안전센터 거리**"):
+                st.dataframe(nearest_station_summary(time), use_container_width=True)
+
+    # 임의 좌표의 최근접 소방서·안전센터, 비상소화장치, 소방용수 격자 조회 섹션
+    with st.container(border=True, height=650):
+        st.markdown('<h4>좌표로 가까운 소방 시설 찾기</h4>', unsafe_allow_html=True)
+
+        col1, col2 = st.columns([3, 7])
+        with col1:
+            # 지난 실행에서 지도를 클릭한 위치를 입력창을 만들기 전에 목록에 추가 (만든 뒤에는 위젯 값을 바꿀 수 없음)
+            clicked = st.session_state.pop('nearest_click', None)
+            if clicked:
+                current = st.session_state.get('nearest_points', '')
+                st.session_state['nearest_points'] = (current.rstrip() + '\n' if current.strip() else '') + clicked
+            text = st.text_area("좌표 목록 (한 줄에 '위도, 경도')", key='nearest_points', height=200,
+                                placeholder='37.5145, 127.1059\n37.5665, 126.9780',
+                                help='지도를 클릭하면 그 위치가 목록에 추가됩니다.')
+            k = st.number_input('대상별 최근접 개수', min_value=1, max_value=MAX_K, value=3, key='nearest_k')
+            selected = st.multiselect('조회 대상', list(LAYERS.values()), default=list(LAYERS.values()), key='nearest_layers')
+            layers = [layer for layer, name in LAYERS.items() if name in selected]
+            lat, lon, invalid = parse_points(text)
+            if invalid:
+                st.caption(f"읽지 못한 줄: {', '.join(map(str, invalid))}")
+
+        # 조회 인덱스는 프로세스당 한 번 만들고, 붙여넣은 지점 전체를 한 번에 배치 조회
+        points = pd.DataFrame({'위도': lat, '경도': lon})
+        results = build_nearest_service().query(lat, lon, k, layers) if len(points) and layers else pd.DataFrame(columns=['지점'])
+
+        with col2:
+            # 지도에는 앞쪽 MAP_POINTS개 지점만 표시 (결과 표는 전체)
+            shown = results[results['지점'] < MAP_POINTS]
+            output = st_folium(visualize_nearest_lookup(points.head(MAP_POINTS), shown), width=800, height=400,
+                               returned_objects=['last_clicked'], key='nearest_map')
+            click = (output or {}).get('last_clicked')
+            if click and click != st.session_state.get('nearest_last_click'):
+                st.session_state['nearest_last_click'] = click
+                st.session_state['nearest_click'] = f"{click['lat']:.6f}, {click['lng']:.6f}"
+                st.rerun()
+
+            st.dataframe(results, height=150, use_container_width=True, hide_index=True)
 
 if __name__ == "__main__":
     main()
@@ -5,8 +5,10 @@ import plotly.graph_objects as go
 import plotly.express as px
 # utils 패키지 내 필요한 함수들을 import
 from utils.ui_helpers import setup_sidebar_links, create_html_button, show_location_info
-from utils.data_loader import load_data, get_locations_data
+from utils.data_loader import load_data, load_geodata, get_locations_data
 from utils.map_visualization import create_fire_equip_map, display_fire_extinguisher_map
+from utils.map_cache import show_map
+from utils.placement import optimize_placement, ALL_GU
 from utils.visualizations import (
     visualize_housing_type_distribution_by_selected_dong,
     visualize_fire_incidents,
@@ -31,6 +33,7 @@ df = load_data("data/2020-2022_송파구_동별_화재건수.csv", encoding='CP9
 df_P = load_data("data/2022-2023_송파구_인구.csv", encoding='CP949')
 df_O = load_data("data/2021-2023_송파구_고령자현황.csv", encoding='CP949')
 df_H = load_data("data/2020_송파구_주택.csv", encoding='CP949')
+boundary_gu = load_geodata("data/boundary/boundary.geojson")['구'].tolist()
 
 # 데이터 전처리
 df = df.replace('-', 0) # '-' 값을 0으로 대체
@@ -49,10 +52,22 @@ def main():
     col1, col2 = st.columns([7,4])
     with col1: # 열 1 - 비상소화장치 위치 지도 시각화
         with st.container(border=True, height=650):  
-            col3, col4 = st.columns([7,3])
+            col3, col5, col4 = st.columns([5,3,3])
             with col3: # 열 3 - 부제목 섹션
                st.markdown('<h4>송파구 비상소화장치 제안 위치</h4>', unsafe_allow_html=True)
 
+            with col5: # 열 5 - 최적화 제안 설정 (보라색 마커로 수동 제안과 함께 표시)
+                with st.popover("⚙️ **최적화 제안 설정**"):
+                    optimize = st.toggle('최적화 제안 표시', value=True, key='placement_on')
+                    placement_gu = st.selectbox('대상 지역', ['송파구'] + sorted(set(boundary_gu) - {'송파구'}) + [ALL_GU], key='placement_gu')
+                    placement_n = st.slider('추가 설치 개수', 1, 30, 10, key='placement_n')
+                    placement_radius = st.slider('서비스 반경(m)', 100, 500, 200, step=50, key='placement_radius')
+                    fire_weight = st.slider('화재건수 가중치', 0.0, 3.0, 1.0, step=0.5, key='placement_fire')
+                    elderly_weight = st.slider('노년인구 가중치', 0.0, 3.0, 1.0, step=0.5, key='placement_elderly',
+                                               help='동별 노년인구 자료가 있는 송파구에만 적용됩니다.')
+                    st.caption('기존 비상소화장치 반경 밖의 격자 표본점(약 100m 간격)을 면적·화재·노년인구로 가중하여, '
+                               '추가로 커버하는 가중치가 가장 큰 위치부터 차례로 선택합니다.')
+
             with col4: # 열 4 - 위치 선정 방법 설명
                 with st.popover("💡 **위치 선정 방법**"):
                     st.markdown("""
@@ -83,10 +98,17 @@ def main():
                         """, unsafe_allow_html=True)
 
 
-            # 송파구 중심 좌표 설정 및 지도 시각화
+            # 송파구 중심 좌표 설정 및 지도 시각화 (최적화 제안 위치를 수동 제안 위치와 함께 표시)
             center = [37.514543, 127.106597]
+            zoom_start = 13
             locations = get_locations_data()
-            display_fire_extinguisher_map(center, locations)
+            proposals = None
+            if optimize:
+                proposals = optimize_placement(placement_gu, placement_n, placement_radius, fire_weight, elderly_weight)
+                if placement_gu != '송파구' and len(proposals) > 0:
+                    center = [proposals['위도'].mean(), proposals['경도'].mean()]
+                    zoom_start = 11 if placement_gu == ALL_GU else 13
+            show_map(display_fire_extinguisher_map(center, locations, zoom_start, proposals=proposals, radius=placement_radius))
 
     with col2: # 열 2 - 각 위치에 대한 상세 정보 제공
         with st.container(border=True, height=650):  
@@ -264,7 +286,7 @@ def main():
          
         with tab1: # 탭 1 - 송파구 비상 소화장치 위치 시각화      
             st.markdown('**현재 송파구 비상소화장치 위치**')
-            create_fire_equip_map(data)  
+            show_map(create_fire_equip_map(data), width=None, height=590)
             
         with tab2: # 탭 2 - 송파구 화재 건수 분석
             st.markdown('**송파구 화재 건수 분석**')            
@@ -0,0 +1,12 @@
+# -*- coding:utf-8 -*-
+import os
+import sys
+import warnings
+
+# 데이터 경로가 저장소 최상위 폴더 기준 상대 경로라서 테스트도 최상위 폴더에서 실행
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# 스트림릿 실행 환경 밖에서 캐시 함수를 부를 때 나오는 경고 무시
+warnings.filterwarnings('ignore', message='.*No runtime found.*')
@@ -0,0 +1,26 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+from utils.cluster_index import ClusterIndex
+
+
+# 서울 중심에서 떨어진 지역(노원구 부근)만 있어도 모든 줌 레벨에서 전체 건수가 클러스터에 담기고 지도 중심이 그 지역이 됨
+def test_off_center_points_keep_all_clusters():
+
+    rng = np.random.default_rng(0)
+    lat = 37.65 + rng.uniform(-0.02, 0.02, 500)
+    lon = 127.06 + rng.uniform(-0.02, 0.02, 500)
+    index = ClusterIndex(lat, lon)
+
+    for zoom in range(10, 18):
+        clusters = index.query(zoom)
+        assert clusters['건수'].sum() == 500
+    center = index.center()
+    assert abs(center[0] - 37.65) < 0.03 and abs(center[1] - 127.06) < 0.03
+
+
+def test_empty_index_uses_default_center():
+
+    index = ClusterIndex([], [])
+    assert index.bounds() is None
+    assert index.center([37.5665, 126.978]) == [37.5665, 126.978]
+    assert index.query(13).empty
@@ -0,0 +1,77 @@
+# -*- coding:utf-8 -*-
+import os
+import glob
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+from utils import data_store, map_cache
+
+
+# 임시 CSV를 load_data로 두 번 읽고, 첫 결과를 수정한 뒤 두 번째 결과를 기록
+def _fallback_app(file_path):
+
+    import streamlit as st
+    from utils.data_loader import load_data
+
+    first = load_data(file_path)
+    first.loc[0, 'a'] = 99
+    second = load_data(file_path)
+    st.session_state['result'] = (first is second, int(second.loc[0, 'a']))
+
+
+def test_source_fallback_returns_private_copies(tmp_path):
+
+    table = tmp_path / 'table.csv'
+    table.write_text('a\n1\n2\n')
+    app = AppTest.from_function(_fallback_app, args=(str(table),)).run()
+    assert app.session_state['result'] == (False, 1)
+
+
+# 저장소의 모든 변환본을 load_data/load_geodata로 읽어 내용 해시를 기록 (프로세스에서 공유하는 바로 그 객체)
+# 표 데이터가 정말 저장소 변환본을 공유하는지(두 번 읽어도 같은 객체인지)도 함께 기록
+def _fingerprint_app():
+
+    import streamlit as st
+    from utils.data_loader import load_data, load_geodata
+    from utils.data_store import read_manifest
+    from utils.map_cache import frame_fingerprint
+
+    fingerprints, shared = {}, []
+    for file_path, entry in read_manifest().items():
+        fingerprints[file_path] = frame_fingerprint(load_data(file_path, entry.get('encoding')))
+        shared.append(load_data(file_path, entry.get('encoding')) is load_data(file_path, entry.get('encoding')))
+        if entry['kind'] == 'geo' or entry.get('geo_store'):
+            fingerprints[f'{file_path} (geo)'] = frame_fingerprint(load_geodata(file_path))
+    st.session_state['fingerprints'] = fingerprints
+    st.session_state['shared'] = all(shared)
+
+
+# 임시 폴더에 전처리 저장소를 만들어 사용 (data/_store는 저장소에 포함되지 않음)
+# 지도 HTML 캐시도 비운 폴더를 써서 페이지마다 지도 함수가 실제로 실행되게 함
+@pytest.fixture
+def temp_store(tmp_path, monkeypatch):
+
+    store_dir = tmp_path / 'store'
+    monkeypatch.setattr(data_store, 'STORE_DIR', str(store_dir))
+    monkeypatch.setattr(data_store, 'MANIFEST_PATH', str(store_dir / 'manifest.json'))
+    monkeypatch.setattr(map_cache, 'MAP_CACHE_DIR', str(tmp_path / 'maps'))
+    data_store.build_data_store()
+    # 앞선 테스트가 변환본 없이 캐시한 로더 결과를 버림 (끝난 뒤에도 임시 저장소를 가리키는 캐시를 남기지 않음)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    yield store_dir
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+# load_data/load_geodata는 저장소 변환본을 모든 세션이 공유하므로 어떤 페이지도 결과를 수정하면 안 됨
+def test_pages_do_not_mutate_shared_frames(temp_store):
+
+    assert os.path.exists(temp_store / 'manifest.json')
+    start = AppTest.from_function(_fingerprint_app, default_timeout=300).run()
+    before = start.session_state['fingerprints']
+    assert start.session_state['shared']
+    for page in ['서울시_화재사고_현황.py'] + sorted(glob.glob('pages/[1234]-*.py')):
+        AppTest.from_file(page, default_timeout=300).run()
+    after = AppTest.from_function(_fingerprint_app, default_timeout=300).run().session_state['fingerprints']
+    assert after == before
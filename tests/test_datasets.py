@@ -0,0 +1,101 @@
+# -*- coding:utf-8 -*-
+from streamlit.testing.v1 import AppTest
+
+
+# 파일 두 개에 각각 등록된 캐시 함수를 부르고 실제로 계산한 횟수를 세션 상태에 기록
+def _dependents_app(changed, unchanged):
+
+    import streamlit as st
+    from utils.datasets import depends_on
+
+    calls = st.session_state.setdefault('calls', [])
+
+    @depends_on(changed)
+    @st.cache_data
+    def from_changed():
+        calls.append('changed')
+        return open(changed).read()
+
+    @depends_on(unchanged)
+    @st.cache_resource
+    def from_unchanged():
+        calls.append('unchanged')
+        return open(unchanged).read()
+
+    st.session_state['values'] = (from_changed(), from_unchanged())
+
+
+def test_changed_file_clears_only_its_dependents(tmp_path):
+
+    changed, unchanged = tmp_path / 'changed.csv', tmp_path / 'unchanged.csv'
+    changed.write_text('a\n1\n')
+    unchanged.write_text('a\n1\n')
+    app = AppTest.from_function(_dependents_app, args=(str(changed), str(unchanged)))
+
+    app.run()
+    app.run()
+    assert app.session_state['values'] == ('a\n1\n', 'a\n1\n')
+    assert app.session_state['calls'] == ['changed', 'unchanged']
+
+    changed.write_text('a\n2\n')
+    app.run()
+    assert app.session_state['values'] == ('a\n2\n', 'a\n1\n')
+    assert app.session_state['calls'] == ['changed', 'unchanged', 'changed']
+
+
+# 서로 다른 조건의 핸들을 max_entries보다 많이 풀었을 때 처음 핸들의 결과가 캐시에 남아 있는지 기록
+def _resolve_app(file_path):
+
+    import streamlit as st
+    from utils.datasets import dataset, RESOLVED_MAX_ENTRIES
+
+    handle = dataset(file_path)
+    first = handle.where(a=0).frame()
+    kept = handle.where(a=0).frame() is first
+    for value in range(1, RESOLVED_MAX_ENTRIES + 1):
+        handle.where(a=value).frame()
+    st.session_state['kept'] = (kept, handle.where(a=0).frame() is first)
+
+
+def test_resolved_frames_are_bounded(tmp_path):
+
+    table = tmp_path / 'table.csv'
+    table.write_text('a\n' + '\n'.join(map(str, range(50))) + '\n')
+    app = AppTest.from_function(_resolve_app, args=(str(table),)).run()
+    assert app.session_state['kept'] == (True, False)
+
+
+# 지리 데이터 두 개와 표 하나를 로더로 읽어 내용과 객체 번호를 세션 상태에 기록
+def _loaders_app(changed, unchanged, table):
+
+    import streamlit as st
+    from utils.data_loader import load_data, load_geodata
+
+    st.session_state.setdefault('runs', []).append((
+        load_geodata(changed)['name'].tolist(), id(load_geodata(unchanged)), load_data(table)['a'].tolist(),
+    ))
+
+
+def _geojson(name):
+
+    return ('{"type": "FeatureCollection", "features": [{"type": "Feature", "properties": {"name": "%s"}, '
+            '"geometry": {"type": "Point", "coordinates": [127.0, 37.5]}}]}' % name)
+
+
+# 로더 캐시는 처음 읽을 때부터 내용 버전을 키로 쓰므로, 파일이 바뀌면 그 파일만 다시 읽고 다른 파일은 그대로 공유
+def test_changed_file_reloads_only_that_file(tmp_path):
+
+    changed, unchanged, table = tmp_path / 'changed.geojson', tmp_path / 'unchanged.geojson', tmp_path / 'table.csv'
+    changed.write_text(_geojson('before'))
+    unchanged.write_text(_geojson('same'))
+    table.write_text('a\n1\n')
+    app = AppTest.from_function(_loaders_app, args=(str(changed), str(unchanged), str(table)))
+
+    app.run()
+    changed.write_text(_geojson('after!'))
+    table.write_text('a\n2\n')
+    app.run()
+    first, second = app.session_state['runs']
+    assert (first[0], first[2]) == (['before'], [1])
+    assert (second[0], second[2]) == (['after!'], [2])
+    assert first[1] == second[1]
@@ -0,0 +1,74 @@
+# -*- coding:utf-8 -*-
+import os
+import folium
+import numpy as np
+import pandas as pd
+from utils import map_cache
+from utils.map_cache import cache_key, cached_map_html, code_fingerprint
+
+
+def test_helper_module_change_changes_fingerprint(tmp_path, monkeypatch):
+
+    package = tmp_path / 'mapfixture'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'colors.py').write_text("LEGEND = [('many', '#08306b')]\n")
+    (package / 'helpers.py').write_text("from mapfixture.colors import LEGEND\n\ndef legend():\n    return LEGEND\n")
+    (package / 'maps.py').write_text("from mapfixture.helpers import legend\n\ndef build():\n    return legend()\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    from mapfixture import maps
+
+    before = code_fingerprint(maps.build)
+    assert code_fingerprint(maps.build) == before
+
+    # 지도 함수가 간접적으로 쓰는 모듈의 상수만 바꿈 (수정 시각도 확실히 달라지게 지정)
+    colors = package / 'colors.py'
+    colors.write_text("LEGEND = [('many', '#67000d')]\n")
+    stat = os.stat(colors)
+    os.utime(colors, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert code_fingerprint(maps.build) != before
+
+
+def test_series_differing_in_the_middle_get_different_keys():
+
+    # repr이 앞뒤 값만 보여주는 길이 (가운데 값 하나만 다름)
+    density = pd.Series(np.linspace(0, 1, 5000), name='화재밀도')
+    changed = density.copy()
+    changed.iloc[2500] += 0.5
+    assert repr(density) == repr(changed)
+
+    assert cache_key('hotspot', (density,), {}) != cache_key('hotspot', (changed,), {})
+    assert cache_key('hotspot', (), {'hotspot': density}) != cache_key('hotspot', (), {'hotspot': changed})
+    assert cache_key('hotspot', ([density],), {}) != cache_key('hotspot', ([changed],), {})
+    assert cache_key('hotspot', (density,), {}) == cache_key('hotspot', (density.copy(),), {})
+
+
+# 인자로 받지 않는 원본 파일을 함수 안에서 읽는 지도 (sources로 등록)
+def _names_map(file_path):
+
+    @cached_map_html(sources=(file_path,))
+    def build():
+        with open(file_path, encoding='utf-8') as f:
+            names = f.read()
+        m = folium.Map(location=[37.564, 126.997], zoom_start=11)
+        m.get_root().html.add_child(folium.Element(f"<div id='names'>{names}</div>"))
+        return m
+
+    return build
+
+
+def test_source_file_change_rebuilds_stored_map(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(map_cache, 'MAP_CACHE_DIR', str(tmp_path / 'maps'))
+    names = tmp_path / 'facilities.csv'
+    names.write_text('강남소방서', encoding='utf-8')
+    build = _names_map(str(names))
+    assert '강남소방서' in build()
+
+    # 크기가 같은 내용으로 바꾸고 수정 시각도 확실히 다르게 지정 (재시작 후처럼 새 함수로도 확인)
+    names.write_text('송파소방서', encoding='utf-8')
+    stat = os.stat(names)
+    os.utime(names, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert '송파소방서' in build()
+    assert '송파소방서' in _names_map(str(names))()
+    assert len(os.listdir(tmp_path / 'maps')) == 2
@@ -0,0 +1,116 @@
+# -*- coding:utf-8 -*-
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+import numpy as np
+import pytest
+from utils.nearest_service import NearestService, make_handler, parse_points
+
+
+# 임의 포트에 조회 서버를 띄우고 기본 URL 반환 (모듈의 테스트가 함께 사용)
+@pytest.fixture(scope='module')
+def server():
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(NearestService()))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/nearest'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+# (상태 코드, JSON 응답) - 4xx/5xx도 본문을 읽음
+def _request(url, body=None):
+
+    data = None if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def test_valid_get_and_post(server):
+
+    status, payload = _request(f'{server}?lat=37.5145&lon=127.1059&k=2&layers=stations')
+    assert status == 200
+    assert len(payload['results']) == 2 and {row['대상'] for row in payload['results']} == {'소방서·안전센터'}
+
+    status, payload = _request(server, {'points': [[37.5145, 127.1059], [37.5665, 126.978]], 'k': 1})
+    assert status == 200
+    assert len(payload['results']) == 2 * 3
+
+
+@pytest.mark.parametrize('query', [
+    'lat=nan&lon=127',
+    'lat=37.5&lon=inf',
+    'lat=-inf&lon=127',
+    'lat=91&lon=127',
+    'lat=37.5&lon=181',
+    'lon=127',
+    'lat=abc&lon=127',
+    'lat=37.5&lon=127&k=0',
+    'lat=37.5&lon=127&k=abc',
+    'lat=37.5&lon=127&layers=stations,rivers',
+])
+def test_invalid_get_returns_400(server, query):
+
+    status, payload = _request(f'{server}?{query}')
+    assert status == 400 and payload['error']
+
+
+@pytest.mark.parametrize('body', [
+    {'points': [[37.5, 127.0]], 'layers': 5},
+    {'points': [[37.5, 127.0]], 'layers': 'stations'},
+    {'points': [[37.5, 127.0]], 'layers': ['stations', 3]},
+    {'points': [[37.5, 127.0]], 'layers': [['stations']]},
+    {'points': [[37.5, 127.0]], 'layers': ['rivers']},
+    {'points': [[float('nan'), 127.0]]},
+    {'points': [[37.5, float('inf')]]},
+    {'points': [[37.5, 127.0], [-95.0, 127.0]]},
+    {'points': [[37.5, 127.0, 1.0]]},
+    {'points': [37.5, 127.0]},
+    {'points': []},
+    {'points': [['a', 'b']]},
+    {'points': [[37.5, 127.0]], 'k': 1e400},
+    {'points': [[37.5, 127.0]], 'k': 'many'},
+    {'points': [[37.5, 127.0]], 'k': True},
+    {'points': [[37.5, 127.0]], 'k': 0},
+    {'k': 3},
+    [[37.5, 127.0]],
+    b'{"points": [[37.5, 127.0]',
+])
+def test_invalid_post_returns_400(server, body):
+
+    status, payload = _request(server, body)
+    assert status == 400 and payload['error']
+
+
+def test_parse_points_rejects_non_finite_and_out_of_range_lines():
+
+    lat, lon, invalid = parse_points('37.5, 127.0\nnan, 127.0\n37.5, inf\n91, 127\n\nabc\n37.6\t127.1')
+    assert np.allclose(lat, [37.5, 37.6]) and np.allclose(lon, [127.0, 127.1])
+    assert invalid == [2, 3, 4, 6]
+
+
+# 좌표 조회 지도만 클릭 위치를 돌려주는 st_folium 대역 (다른 지도는 클릭 없음)
+def _clicking_folium(*args, key=None, **kwargs):
+
+    return {'last_clicked': {'lat': 37.5145, 'lng': 127.1059}} if key == 'nearest_map' else None
+
+
+# 지도를 클릭하면 페이지가 오류 없이 다시 실행되고 클릭 위치가 좌표 목록에 추가됨
+def test_lookup_map_click_appends_point(monkeypatch):
+
+    from streamlit.testing.v1 import AppTest
+    monkeypatch.setattr('streamlit_folium.st_folium', _clicking_folium)
+    # 사이드바 페이지 링크가 등록되도록 메인 페이지를 먼저 실행
+    AppTest.from_file('서울시_화재사고_현황.py', default_timeout=300).run()
+    app = AppTest.from_file('pages/2-소방_인프라_분석.py', default_timeout=300)
+    app.session_state['nearest_points'] = '37.5665, 126.9780'
+    app.run()
+    assert not app.exception
+    assert app.text_area(key='nearest_points').value == '37.5665, 126.9780\n37.514500, 127.105900'
@@ -0,0 +1,52 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import dijkstra
+from utils.scoring import load_indicators
+from utils.simulator import SimulationBase, StationSimulator, TIME_INDICATOR
+
+
+# 노드 0-1-2가 1분 간격으로 이어지고 노드 3은 어느 노드와도 이어지지 않은 섬인 작은 시뮬레이션 자료
+# 안전센터 A(노드 0), B(노드 2)는 첫 번째 자치구에 있고, 모든 자치구 인구를 노드 0과 섬(노드 3)에 나눠 둠
+def _island_base():
+
+    base = object.__new__(SimulationBase)
+    base.indicators = load_indicators()
+    base.gus = base.indicators['자치구'].tolist()
+    base.graph = sparse.csr_matrix(([60.0, 60.0, 60.0, 60.0], ([0, 1, 1, 2], [1, 0, 2, 1])), shape=(4, 4))
+    base.facilities = pd.DataFrame({'서ㆍ센터명': ['A', 'B'], '유형구분명': ['안전센터', '안전센터'], '구': [base.gus[0]] * 2})
+    base.times = (dijkstra(base.graph, indices=[0, 2]) / 60).astype(np.float32)
+    base.center_counts = np.r_[2, np.zeros(len(base.gus) - 1, dtype=int)]
+    base.gu_population = np.full(len(base.gus), 1000.0)
+
+    gu = np.arange(len(base.gus))
+    base.population = sparse.csr_matrix((np.r_[np.full(len(gu), 900.0), np.full(len(gu), 100.0)],
+                                         (np.r_[np.zeros(len(gu), dtype=int), np.full(len(gu), 3)], np.r_[gu, gu])),
+                                        shape=(4, len(base.gus)))
+    base.node_gu = np.zeros(4, dtype=int)
+    base.cell_node = np.arange(4)
+    return base
+
+
+def test_summary_with_unreachable_island_is_finite():
+
+    simulator = StationSimulator(_island_base())
+    assert np.isinf(simulator.minutes[3])
+
+    summary = simulator.summary().set_index('자치구')
+    change = summary[f'{TIME_INDICATOR} 변화(초)']
+    assert change.notna().all() and (change == 0).all()
+    assert summary['7분 커버리지(%)'].round().eq(90).all()
+
+    # A를 닫으면 노드 0은 B에서 2분 -> 도달 가능한 인구의 평균 도달 시간이 120초 늘어남 (섬은 평균에서 제외)
+    simulator.sync(closed=['A'])
+    change = simulator.summary().set_index('자치구')[f'{TIME_INDICATOR} 변화(초)']
+    assert np.allclose(change, 120)
+
+    # 모든 시설을 닫아도 NaN 대신 도달 가능한 노드가 없다는 뜻으로 0, 커버리지는 모두 잃음
+    simulator.sync(closed=['A', 'B'])
+    summary = simulator.summary()
+    assert summary[f'{TIME_INDICATOR} 변화(초)'].notna().all()
+    assert summary['7분 커버리지 변화(%p)'].round().eq(-90).all()
+    assert summary['변경 후 순위'].notna().all()
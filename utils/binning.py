@@ -0,0 +1,96 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+import pandas as pd
+import shapely
+import geopandas as gpd
+import streamlit as st
+from utils.data_loader import load_geodata
+from utils.coverage import DEVICES_PATH
+from utils.hotspot import PROJECTED_CRS, to_projected
+from utils.datasets import depends_on
+
+GRID_PATH = "data/seoul_500_grid_water.csv"
+
+# 다시 집계하는 지점 자료의 원본 파일
+SOURCE_PATHS = (DEVICES_PATH, GRID_PATH)
+
+# 격자 한 변(사각형) 또는 중심 간 거리(육각형)의 선택 범위(m)
+RESOLUTIONS = [100, 250, 500, 1000, 2000]
+SHAPES = {'사각형': 'square', '육각형': 'hex'}
+
+# 모든 격자가 같은 기준점에서 시작하도록 고정 (서울 남서쪽 바깥, UTM-K)
+ORIGIN = (935000.0, 1935000.0)
+
+
+# 점을 담을 지점 자료: 위경도와 가중치
+# 소방용수 개별 위치 자료가 없어서 소방용수는 500m 격자 중심에 셀의 소방용수 수를 가중치로 둔 점으로 근사
+@depends_on(*SOURCE_PATHS)
+@st.cache_data
+def point_source(source):
+
+    if source == '비상소화장치':
+        devices = load_geodata(DEVICES_PATH)
+        return devices.geometry.y.to_numpy(), devices.geometry.x.to_numpy(), np.ones(len(devices))
+
+    grid = load_geodata(GRID_PATH)
+    centroids = shapely.centroid(np.asarray(grid.geometry.values))
+    return shapely.get_y(centroids), shapely.get_x(centroids), grid['소방용수_수'].fillna(0).to_numpy(dtype=float)
+
+
+# 사각 격자 번호: 좌표를 셀 크기로 나눈 몫 (i, j)
+def square_index(x, y, size):
+
+    return np.floor((x - ORIGIN[0]) / size).astype(np.int64), np.floor((y - ORIGIN[1]) / size).astype(np.int64)
+
+
+# 육각 격자(뾰족한 면이 위) 번호: 축 좌표 (q, r)를 큐브 좌표 반올림으로 계산
+def hex_index(x, y, size):
+
+    radius = size / np.sqrt(3)
+    px, py = (x - ORIGIN[0]) / radius, (y - ORIGIN[1]) / radius
+    q = np.sqrt(3) / 3 * px - py / 3
+    r = 2 / 3 * py
+    cx, cz = q, r
+    cy = -cx - cz
+    rx, ry, rz = np.round(cx), np.round(cy), np.round(cz)
+    dx, dy, dz = np.abs(rx - cx), np.abs(ry - cy), np.abs(rz - cz)
+    fix_x = (dx > dy) & (dx > dz)
+    fix_z = ~fix_x & (dz >= dy)
+    rx = np.where(fix_x, -ry - rz, rx)
+    rz = np.where(fix_z, -rx - ry, rz)
+    return rx.astype(np.int64), rz.astype(np.int64)
+
+
+# 격자 번호 -> 셀 폴리곤 (UTM-K 좌표)
+def cell_polygons(a, b, size, shape):
+
+    if shape == 'square':
+        x0 = ORIGIN[0] + a * size
+        y0 = ORIGIN[1] + b * size
+        return shapely.box(x0, y0, x0 + size, y0 + size)
+
+    radius = size / np.sqrt(3)
+    cx = ORIGIN[0] + radius * np.sqrt(3) * (a + b / 2)
+    cy = ORIGIN[1] + radius * 1.5 * b
+    angles = np.radians(30 + 60 * np.arange(7))
+    ring_x = cx[:, None] + radius * np.cos(angles)
+    ring_y = cy[:, None] + radius * np.sin(angles)
+    return shapely.polygons(np.stack([ring_x, ring_y], axis=-1))
+
+
+# 지점을 사각/육각 격자로 집계한 GeoDataFrame (점이 있는 셀만, '수' = 가중치 합) - 해상도/모양마다 캐시
+@depends_on(*SOURCE_PATHS)
+@st.cache_data
+def binned_grid(source, size, shape='square'):
+
+    lat, lon, weights = point_source(source)
+    x, y = to_projected(lat, lon)
+    a, b = (square_index if shape == 'square' else hex_index)(np.asarray(x), np.asarray(y), size)
+
+    cells, inverse = np.unique(np.column_stack([a, b]), axis=0, return_inverse=True)
+    totals = np.bincount(inverse.ravel(), weights=weights, minlength=len(cells))
+    keep = totals > 0
+
+    polygons = cell_polygons(cells[keep, 0], cells[keep, 1], size, shape)
+    gdf = gpd.GeoDataFrame({'수': totals[keep]}, geometry=polygons, crs=PROJECTED_CRS).to_crs('EPSG:4326')
+    return gdf.reset_index(drop=True)
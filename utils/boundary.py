@@ -0,0 +1,133 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+import shapely
+import geopandas as gpd
+import streamlit as st
+from utils.data_loader import load_geodata
+from utils.datasets import depends_on
+
+BOUNDARY_PATH = "data/boundary/boundary.geojson"
+
+# 단순화 수준별 허용 오차(도) - 약 20m / 80m / 250m
+BOUNDARY_LEVELS = {'high': 0.0002, 'medium': 0.0008, 'low': 0.0025}
+
+# 좌표 양자화 단위(도, 약 1m): 인접 구가 공유하는 꼭짓점을 정확히 일치시키고 좌표 자릿수를 줄임
+QUANTUM = 1e-5
+
+
+# 폴리곤/멀티폴리곤의 링(외곽선, 구멍)을 (도형 번호, 폴리곤 번호, 링 번호, 좌표) 목록으로 분해
+def _rings(geoms):
+
+    rings = []
+    for gi, geom in enumerate(geoms):
+        for pi, polygon in enumerate(getattr(geom, 'geoms', [geom])):
+            for ri, ring in enumerate([polygon.exterior] + list(polygon.interiors)):
+                rings.append((gi, pi, ri, np.asarray(ring.coords)[:-1]))
+    return rings
+
+
+# 링을 양자화된 꼭짓점 번호 배열로 변환 (연속 중복 제거)
+def _quantize(rings, origin):
+
+    coords = np.vstack([r[3] for r in rings])
+    q = np.round((coords - origin) / QUANTUM).astype(np.int64)
+    points, inverse = np.unique(q, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+
+    ids, start = [], 0
+    for r in rings:
+        ring = inverse[start:start + len(r[3])]
+        start += len(r[3])
+        keep = ring != np.roll(ring, 1)
+        ids.append(ring[keep])
+    return points, ids
+
+
+# 교차점 찾기: 서로 다른 이웃이 3개 이상인 꼭짓점 (TopoJSON과 같은 기준)
+def _junctions(ids, n_points):
+
+    point = np.concatenate(ids)
+    prev = np.concatenate([np.roll(r, 1) for r in ids])
+    nxt = np.concatenate([np.roll(r, -1) for r in ids])
+    pairs = np.unique(np.column_stack([np.r_[point, point], np.r_[prev, nxt]]), axis=0)
+    degree = np.bincount(pairs[:, 0], minlength=n_points)
+    return degree > 2
+
+
+# 링을 교차점에서 잘라 호(arc) 목록으로 분해, 교차점이 없는 링은 하나의 닫힌 호
+def _split_arcs(ring, junction):
+
+    cuts = np.flatnonzero(junction[ring])
+    if len(cuts) == 0:
+        # 공유되는 닫힌 링도 같은 키가 되도록 가장 작은 번호에서 시작
+        start = int(np.argmin(ring))
+        ring = np.roll(ring, -start)
+        return [np.r_[ring, ring[0]]]
+    ring = np.roll(ring, -cuts[0])
+    cuts = np.r_[cuts - cuts[0], len(ring)]
+    ring = np.r_[ring, ring[0]]
+    return [ring[a:b + 1] for a, b in zip(cuts[:-1], cuts[1:])]
+
+
+# 위상 보존 단순화: 공유 경계(호)를 한 번만 단순화해서 양쪽 구가 같은 선을 쓰도록 함
+def simplify_coverage(gdf, tolerance):
+
+    geoms = gdf.geometry.values
+    origin = shapely.bounds(geoms)[:, :2].min(axis=0)
+    rings = _rings(geoms)
+    points, ids = _quantize(rings, origin)
+    junction = _junctions(ids, len(points))
+
+    simplified = {}
+    polygons = {}
+    for (gi, pi, ri, _), ring in zip(rings, ids):
+        parts = []
+        for arc in _split_arcs(ring, junction):
+            key = tuple(arc) if tuple(arc) <= tuple(arc[::-1]) else tuple(arc[::-1])
+            if key not in simplified:
+                # 양 끝점(교차점)은 Douglas-Peucker에서 항상 유지됨
+                line = shapely.LineString(points[list(key)] * QUANTUM)
+                simplified[key] = np.round(np.asarray(line.simplify(tolerance).coords) / QUANTUM).astype(np.int64)
+            coords = simplified[key] if key == tuple(arc) else simplified[key][::-1]
+            parts.append(coords[:-1])
+        coords = np.vstack(parts + [parts[0][:1]])
+
+        # 너무 단순화되어 링이 무너지면 원래 꼭짓점을 사용
+        if len(np.unique(coords, axis=0)) < 3:
+            coords = points[np.r_[ring, ring[0]]]
+        polygons.setdefault((gi, pi), []).append((origin + coords * QUANTUM).round(5))
+
+    result = []
+    for gi in range(len(geoms)):
+        parts = [shapely.Polygon(rs[0], rs[1:]) for (g, _), rs in sorted(polygons.items()) if g == gi]
+        result.append(parts[0] if len(parts) == 1 else shapely.MultiPolygon(parts))
+    return gpd.GeoDataFrame(gdf.drop(columns='geometry'), geometry=result, crs=gdf.crs)
+
+
+# 서울시 구 경계의 단순화 수준별 GeoDataFrame을 프로세스당 한 번 계산해서 공유
+@depends_on(BOUNDARY_PATH)
+@st.cache_resource
+def boundary_levels():
+
+    gdf = load_geodata(BOUNDARY_PATH)
+    return {level: simplify_coverage(gdf, tolerance) for level, tolerance in BOUNDARY_LEVELS.items()}
+
+
+# 단순화된 구 경계 반환 ('full'이면 원본)
+def load_boundary(level='medium'):
+
+    if level == 'full':
+        return load_geodata(BOUNDARY_PATH)
+    return boundary_levels()[level]
+
+
+# 지도 줌 레벨에 맞는 단순화 수준 선택
+def boundary_level_for_zoom(zoom):
+
+    if zoom <= 10:
+        return 'low'
+    elif zoom <= 12:
+        return 'medium'
+    elif zoom <= 14:
+        return 'high'
+    return 'full'
@@ -0,0 +1,108 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 클러스터 반경(px)과 타일 크기(px) - supercluster 기본값과 동일
+CLUSTER_RADIUS = 60
+TILE_EXTENT = 256
+
+# 프로세스에 남겨 둘 최대 클러스터 인덱스 수 (구/동/기간 조건마다 인덱스가 생겨도 가장 오래 쓰지 않은 것부터 버림)
+CLUSTER_INDEX_MAX_ENTRIES = 16
+
+
+# 위경도 -> Web Mercator 정규 좌표(0~1)
+def project(lat, lon):
+
+    x = np.asarray(lon, dtype=float) / 360 + 0.5
+    sin = np.sin(np.radians(np.asarray(lat, dtype=float)))
+    y = 0.5 - 0.25 * np.log((1 + sin) / (1 - sin)) / np.pi
+    return x, np.clip(y, 0, 1)
+
+
+# Web Mercator 정규 좌표(0~1) -> 위경도
+def unproject(x, y):
+
+    lon = (np.asarray(x) - 0.5) * 360
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y)))))
+    return lat, lon
+
+
+# 줌 레벨별 계층 클러스터 인덱스 (NumPy 격자 병합)
+class ClusterIndex:
+
+    def __init__(self, lat, lon, weights=None, min_zoom=0, max_zoom=16, radius=CLUSTER_RADIUS):
+
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        x, y = project(lat[valid], lon[valid])
+        count = np.ones(len(x)) if weights is None else np.asarray(weights, dtype=float)[valid]
+
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.levels = {}
+
+        # max_zoom + 1 레벨은 개별 지점, 그 위로는 이전 레벨의 클러스터를 격자 단위로 병합
+        self.levels[max_zoom + 1] = self._sorted_level(x, y, count)
+        for zoom in range(max_zoom, min_zoom - 1, -1):
+            cell = radius / (TILE_EXTENT * 2 ** zoom)
+            ix = np.floor(x / cell).astype(np.int64)
+            iy = np.floor(y / cell).astype(np.int64)
+            _, inverse = np.unique(ix * (2 ** 32) + iy, return_inverse=True)
+
+            # 가중 중심과 합계를 bincount로 한 번에 계산
+            total = np.bincount(inverse, weights=count)
+            x = np.bincount(inverse, weights=x * count) / total
+            y = np.bincount(inverse, weights=y * count) / total
+            count = total
+            self.levels[zoom] = self._sorted_level(x, y, count)
+
+    # 영역 질의를 위해 x 기준으로 정렬해서 보관
+    @staticmethod
+    def _sorted_level(x, y, count):
+
+        order = np.argsort(x, kind='stable')
+        return x[order], y[order], count[order]
+
+    # 지점 전체를 감싸는 영역 (남, 서, 북, 동), 지점이 없으면 None
+    def bounds(self):
+
+        x, y, _ = self.levels[self.max_zoom + 1]
+        if len(x) == 0:
+            return None
+        (south, north), (west, east) = unproject([x.min(), x.max()], [y.max(), y.min()])
+        return float(south), float(west), float(north), float(east)
+
+    # 지점 전체 영역의 중심 (위도, 경도), 지점이 없으면 default
+    def center(self, default=None):
+
+        bounds = self.bounds()
+        if bounds is None:
+            return default
+        south, west, north, east = bounds
+        return [(south + north) / 2, (west + east) / 2]
+
+    # 줌 레벨과 영역(남, 서, 북, 동)에 해당하는 클러스터 중심과 건수 반환
+    def query(self, zoom, bbox=None):
+
+        zoom = int(np.clip(np.floor(zoom), self.min_zoom, self.max_zoom + 1))
+        x, y, count = self.levels[zoom]
+
+        if bbox is not None:
+            south, west, north, east = bbox
+            (x0, x1), (y1, y0) = project([south, north], [west, east])
+            start, stop = np.searchsorted(x, [x0, x1])
+            x, y, count = x[start:stop], y[start:stop], count[start:stop]
+            mask = (y >= y0) & (y <= y1)
+            x, y, count = x[mask], y[mask], count[mask]
+
+        lat, lon = unproject(x, y)
+        return pd.DataFrame({'위도': lat, '경도': lon, '건수': count.astype(int)})
+
+
+# 좌표 배열로 클러스터 인덱스를 만들어 프로세스 내에서 공유
+@st.cache_resource(max_entries=CLUSTER_INDEX_MAX_ENTRIES)
+def build_cluster_index(lat, lon, weights=None):
+
+    return ClusterIndex(lat, lon, weights)
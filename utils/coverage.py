@@ -0,0 +1,116 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+import pandas as pd
+import shapely
+import streamlit as st
+from utils.data_loader import load_geodata
+from utils.spatial import FacilityIndex
+from utils.boundary import BOUNDARY_PATH
+from utils.datasets import depends_on
+
+DEVICES_PATH = "data/서울시_비상소화장치_좌표_구동.csv"
+
+# 격자 표본점 거리/구 판정에 쓰는 원본 파일 (격자 자체는 호출하는 쪽의 key로 구분)
+COVERAGE_SOURCES = (DEVICES_PATH, BOUNDARY_PATH)
+
+# 격자 셀 한 변당 표본점 수 (500m 셀 기준 약 100m 간격)
+SAMPLES_PER_SIDE = 5
+
+
+# 비상소화장치 좌표의 BallTree 인덱스 (구/동 이름 포함)
+@depends_on(DEVICES_PATH)
+@st.cache_resource
+def build_device_index(file_path=DEVICES_PATH):
+
+    gdf = load_geodata(file_path)
+    return FacilityIndex(pd.DataFrame({
+        '위도': gdf.geometry.y.values, '경도': gdf.geometry.x.values,
+        '구': gdf['구'].values, '동': gdf['동'].values,
+    }))
+
+
+# 셀마다 경계 상자를 per_side x per_side 등간격으로 나눈 표본점 중 셀 안에 있는 점만 생성
+# 반환: 표본점의 셀 번호, 경도, 위도 (같은 면적을 대표하므로 비율이 곧 면적 비율)
+def sample_cells(geoms, per_side=SAMPLES_PER_SIDE):
+
+    bounds = shapely.bounds(np.asarray(geoms))
+    steps = (np.arange(per_side) + 0.5) / per_side
+    fx, fy = [f.ravel() for f in np.meshgrid(steps, steps)]
+
+    cell = np.repeat(np.arange(len(bounds)), len(fx))
+    lon = bounds[cell, 0] + np.tile(fx, len(bounds)) * (bounds[cell, 2] - bounds[cell, 0])
+    lat = bounds[cell, 1] + np.tile(fy, len(bounds)) * (bounds[cell, 3] - bounds[cell, 1])
+
+    inside = shapely.contains_xy(np.asarray(geoms)[cell], lon, lat)
+    return cell[inside], lon[inside], lat[inside]
+
+
+# 격자 표본점의 좌표와 최근접 비상소화장치 거리, 셀 중심의 거리, 표본점의 구/동을 한 번 계산해서 공유
+# 구는 경계 폴리곤으로 정확히, 동은 경계 자료가 없어 가장 가까운 장치의 동으로 근사
+# key는 격자 데이터셋 핸들의 cache_key (격자 내용 버전 포함), 장치/경계 파일이 바뀌면 depends_on으로 다시 계산
+@depends_on(*COVERAGE_SOURCES)
+@st.cache_resource
+def grid_sample_distances(_grid, key, per_side=SAMPLES_PER_SIDE):
+
+    geoms = np.asarray(_grid.geometry.values)
+    devices = build_device_index()
+    cell, lon, lat = sample_cells(geoms, per_side)
+    indices, distances, _ = devices.query(lat, lon)
+
+    centroids = shapely.centroid(geoms)
+    _, centroid_distances, _ = devices.query(shapely.get_y(centroids), shapely.get_x(centroids))
+
+    # 구 폴리곤이 25개뿐이라 준비된(prepared) 폴리곤별 contains_xy가 STRtree 질의보다 훨씬 빠름
+    boundary = load_geodata(BOUNDARY_PATH)
+    gu = np.full(len(lon), None, dtype=object)
+    for name, polygon in zip(boundary['구'], boundary.geometry.values):
+        shapely.prepare(polygon)
+        gu[shapely.contains_xy(polygon, lon, lat)] = name
+
+    return pd.DataFrame({
+        '셀': cell,
+        '경도': lon,
+        '위도': lat,
+        '거리': distances[:, 0],
+        '구': gu,
+        '동_구': devices.facilities['구'].values[indices[:, 0]],
+        '동': devices.facilities['동'].values[indices[:, 0]],
+    }), centroid_distances[:, 0]
+
+
+# 셀별 최근접 장치 거리(셀 중심 기준, m)와 반경 내 면적 비율 (표본점이 없는 셀은 NaN)
+@depends_on(*COVERAGE_SOURCES)
+@st.cache_data
+def grid_coverage(_grid, key, radius, per_side=SAMPLES_PER_SIDE):
+
+    samples, centroid_distances = grid_sample_distances(_grid, key, per_side)
+    n_cells = len(_grid)
+    total = np.bincount(samples['셀'], minlength=n_cells)
+    covered = np.bincount(samples['셀'], weights=samples['거리'] <= radius, minlength=n_cells)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = covered / total
+    return pd.DataFrame({'최근접장치거리(m)': centroid_distances.round(), '반경내비율': share}, index=_grid.index)
+
+
+# 구 또는 동별 반경 내 면적 비율과 표본점 기준 평균/최대 최근접 거리
+@depends_on(*COVERAGE_SOURCES)
+@st.cache_data
+def area_coverage(_grid, key, radius, level='구', per_side=SAMPLES_PER_SIDE):
+
+    samples, _ = grid_sample_distances(_grid, key, per_side)
+    samples = samples.assign(반경내=samples['거리'] <= radius)
+    if level == '동':
+        # 동은 가장 가까운 장치의 (구, 동)으로 묶음
+        samples = samples.drop(columns='구').rename(columns={'동_구': '구'})
+        columns = ['구', '동']
+    else:
+        columns = ['구']
+    summary = samples.dropna(subset=columns).groupby(columns).agg(
+        반경내비율=('반경내', 'mean'),
+        평균거리=('거리', 'mean'),
+        최대거리=('거리', 'max'),
+    )
+    summary['반경내비율'] = (summary['반경내비율'] * 100).round(1)
+    summary[['평균거리', '최대거리']] = summary[['평균거리', '최대거리']].round().astype(int)
+    summary.columns = [f'반경 {radius}m 내 면적(%)', '평균 거리(m)', '최대 거리(m)']
+    return summary.sort_values(summary.columns[0])
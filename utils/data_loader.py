@@ -1,14 +1,22 @@
-import streamlit as st
-import pandas as pd
-import geopandas as gpd
-
 import pandas as pd
 import geopandas as gpd
 import streamlit as st
+from utils.data_store import file_version, load_from_store, read_source, to_geodataframe
 
-# 데이터 로드 함수
-@st.cache_data
-def load_data(file_path, encoding=None):
+# 로더별로 프로세스에 남겨 둘 최대 항목 수 (data/ 원본 파일 수보다 넉넉하게 잡음)
+# 로더 캐시 키에 원본 내용 버전이 들어 있어서, 내용이 바뀌기 전 버전의 항목은 다시 쓰이지 않고 가장 먼저 버려짐
+LOADER_MAX_ENTRIES = 32
+
+# 전처리 저장소(data/_store)의 변환본을 프로세스당 한 번 열어 모든 세션이 공유 (없거나 원본과 다르면 None)
+# Arrow 변환본은 읽기 전용 메모리 매핑이라 여러 서버 프로세스가 한 벌의 데이터를 공유
+@st.cache_resource(max_entries=LOADER_MAX_ENTRIES)
+def _load_stored(file_path, version):
+
+    return load_from_store(file_path)
+
+# 변환본이 없을 때 원본 파일 읽기 (st.cache_data라 호출할 때마다 복사본을 돌려줌)
+@st.cache_data(max_entries=LOADER_MAX_ENTRIES)
+def _read_source(file_path, encoding, version):
 
     # Determine the file type from the file extension
     file_type = file_path.split('.')[-1].lower()
@@ -18,13 +26,75 @@ def load_data(file_path, encoding=None):
             return pd.read_csv(file_path, encoding=encoding)
         else:
             return pd.read_csv(file_path)
-    elif file_type == 'shp':
+    elif file_type in ['shp', 'geojson']:
         return gpd.read_file(file_path)
     elif file_type in ['xlsx', 'xls']:
         return pd.read_excel(file_path)
     else:
         raise ValueError(f"Unsupported file type: {file_type}")
 
+# 데이터 로드 함수
+# 저장소 변환본은 복사하지 않고 모든 호출에 같은 객체를 돌려주므로 호출하는 쪽에서 수정하지 말고 필터링/복사해서 사용
+# (tests/test_data_loader.py가 모든 페이지를 실행한 뒤 공유 데이터가 그대로인지 확인)
+# 변환본이 없으면 원본을 읽은 결과의 복사본이라 수정해도 다른 호출에 영향이 없음
+# 캐시 키에 원본 내용 버전을 넣어서 파일이 바뀌면 그 파일만 다시 읽음 (다른 파일의 캐시는 그대로)
+def load_data(file_path, encoding=None):
+
+    version = file_version(file_path)
+    stored = _load_stored(file_path, version)
+    if stored is not None:
+        return stored
+    return _read_source(file_path, encoding, version)
+
+# 지리 데이터 로드 함수: CRS가 지정된 GeoDataFrame을 프로세스당 한 번만 만들어 공유
+# (모든 세션이 같은 객체를 읽으므로 호출하는 쪽에서 수정하지 않고 필터링/복사해서 사용)
+def load_geodata(file_path, crs='EPSG:4326'):
+
+    return _load_geodata(file_path, crs, file_version(file_path))
+
+@st.cache_resource(max_entries=LOADER_MAX_ENTRIES)
+def _load_geodata(file_path, crs, version):
+
+    # 전처리 저장소의 GeoParquet이 최신이면 WKT 파싱 없이 바로 사용
+    gdf = load_from_store(file_path, geo=True)
+
+    if gdf is None:
+        file_type = file_path.split('.')[-1].lower()
+        if file_type in ['shp', 'geojson']:
+            gdf = gpd.read_file(file_path)
+        else:
+            # WKT geometry 열을 벡터화된 from_wkt로 한 번에 변환 (CSV 인코딩은 utf-8, cp949 순서로 시도)
+            gdf = to_geodataframe(read_source(file_path)[0])
+            if gdf is None:
+                raise ValueError(f"No WKT geometry column: {file_path}")
+
+    if gdf.crs is None:
+        gdf = gdf.set_crs(crs)
+    return gdf
+
+# 동별 화재발생 장소 데이터를 (자치구, 동, 장소 유형) 건수 큐브로 변환
+# 구 합계는 동='전체', 서울시 합계는 자치구='서울시 전체'로 함께 저장해서 그래프는 잘라 쓰기만 함
+def load_place_type_cube(file_path):
+
+    return _place_type_cube(file_path, file_version(file_path))
+
+@st.cache_data(max_entries=LOADER_MAX_ENTRIES)
+def _place_type_cube(file_path, version):
+
+    df = load_data(file_path).drop(columns=["Unnamed: 0"], errors='ignore')
+    place_types = df.columns.drop(['자치구', '동'])
+
+    # 구/서울시 합계 행을 한 번에 계산해서 동별 행 뒤에 붙임
+    gu_total = df.groupby('자치구', sort=False)[place_types].sum().reset_index().assign(동='전체')
+    seoul_total = df[place_types].sum().to_frame().T.assign(자치구='서울시 전체', 동='전체')
+    df = pd.concat([df, gu_total, seoul_total], ignore_index=True)
+
+    cube = df.melt(id_vars=['자치구', '동'], value_vars=place_types, var_name='장소 유형', value_name='건수')
+    for column in ['자치구', '동', '장소 유형']:
+        cube[column] = pd.Categorical(cube[column], categories=cube[column].unique())
+    cube['건수'] = cube['건수'].astype('int32')
+    return cube.set_index(['자치구', '동', '장소 유형'])['건수'].sort_index()
+
 @st.cache_data
 def get_locations_data():
 
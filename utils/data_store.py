@@ -0,0 +1,217 @@
+# -*- coding:utf-8 -*-
+import os
+import json
+import hashlib
+import logging
+import pandas as pd
+import geopandas as gpd
+
+logger = logging.getLogger(__name__)
+
+# 원본 데이터 폴더와 전처리 저장소(열 기반 Parquet/GeoParquet) 위치
+DATA_DIR = 'data'
+STORE_DIR = os.path.join(DATA_DIR, '_store')
+MANIFEST_PATH = os.path.join(STORE_DIR, 'manifest.json')
+
+# 변환 대상 파일 형식과 CSV 인코딩 후보 (cp949는 euc-kr을 포함)
+TABLE_TYPES = ('csv', 'xlsx', 'xls')
+GEO_TYPES = ('shp', 'geojson')
+CSV_ENCODINGS = ('utf-8', 'cp949')
+
+# 변환하지 않는 폴더 (사진, 저장소 자체)
+SKIP_DIRS = ('_store', '사진')
+
+
+# 파일 내용의 sha256 해시 계산
+def file_hash(path):
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 파일별 ((크기, 수정시각), 내용 버전) - 크기와 수정시각이 그대로면 다시 해시하지 않음
+_VERSIONS = {}
+
+
+# 원본 파일의 내용 버전 (sha256 앞 16자리), 평소에는 os.stat 한 번으로 확인
+def file_version(file_path):
+
+    stat = os.stat(file_path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    known = _VERSIONS.get(file_path)
+    if known is None or known[0] != signature:
+        known = _VERSIONS[file_path] = (signature, file_hash(file_path)[:16])
+    return known[1]
+
+
+# 원본 경로('data/...')를 manifest 키로 정규화
+def source_key(file_path):
+
+    return os.path.relpath(file_path).replace(os.sep, '/')
+
+
+# 원본 경로에 대응하는 저장소 파일 경로
+def _store_path(key, suffix):
+
+    name = key.replace('/', '__')
+    return os.path.join(STORE_DIR, f'{name}{suffix}')
+
+
+# manifest 읽기 (없으면 빈 딕셔너리)
+def read_manifest():
+
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 저장소 변환본이 원본과 일치하는지 확인 (크기/수정시각이 같으면 해시 생략)
+def is_fresh(file_path, entry):
+
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return False
+    if stat.st_size == entry['size'] and stat.st_mtime == entry['mtime']:
+        return True
+    return stat.st_size == entry['size'] and file_hash(file_path) == entry['sha256']
+
+
+# 원본 파일 읽기 (CSV는 인코딩을 순서대로 시도)
+def read_source(file_path):
+
+    file_type = file_path.split('.')[-1].lower()
+
+    if file_type == 'csv':
+        for encoding in CSV_ENCODINGS:
+            try:
+                return pd.read_csv(file_path, encoding=encoding), encoding
+            except UnicodeDecodeError:
+                continue
+        raise ValueError(f"Unknown encoding: {file_path}")
+    elif file_type in GEO_TYPES:
+        return gpd.read_file(file_path), None
+    elif file_type in ['xlsx', 'xls']:
+        return pd.read_excel(file_path), None
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+
+# WKT 문자열 geometry 열이 있으면 GeoDataFrame으로 변환 (없으면 None)
+def to_geodataframe(df):
+
+    if 'geometry' not in df.columns or isinstance(df, gpd.GeoDataFrame):
+        return None
+    if not df['geometry'].astype(str).str.match(r'^\s*[A-Z]+\s*\(').all():
+        return None
+    geometry = gpd.GeoSeries.from_wkt(df['geometry'], crs='EPSG:4326')
+    return gpd.GeoDataFrame(df.drop(columns='geometry'), geometry=geometry)
+
+
+# 표 데이터 변환본에 Arrow 파일이 있는지 확인 (Arrow 저장 이전에 만든 저장소도 다시 빌드하면 채워짐)
+def _has_arrow(entry):
+
+    return entry['kind'] != 'table' or os.path.exists(entry.get('arrow') or '')
+
+
+# 데이터프레임 -> 압축하지 않은 Arrow IPC 파일 (임시 파일에 쓴 뒤 교체해서 읽는 프로세스와 겹치지 않게 함)
+def write_arrow(df, path):
+
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = f'{path}.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+# Arrow IPC 파일을 읽기 전용으로 메모리 매핑해서 데이터프레임으로 변환
+# 결측값이 없는 숫자 열은 복사 없이 매핑된 버퍼를 그대로 쓰므로(split_blocks) 같은 호스트의 프로세스들이
+# 운영체제 페이지 캐시의 한 벌을 공유함 (문자열 열만 파이썬 객체로 변환)
+def load_arrow(path):
+
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+# 저장소 빌드: data/ 아래 모든 원본을 Parquet(기하 데이터는 GeoParquet)으로 변환
+def build_data_store(data_dir=DATA_DIR, force=False):
+
+    os.makedirs(STORE_DIR, exist_ok=True)
+    manifest = read_manifest()
+
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for name in sorted(files):
+            file_type = name.split('.')[-1].lower()
+            if file_type not in TABLE_TYPES + GEO_TYPES:
+                continue
+
+            file_path = os.path.join(root, name)
+            key = source_key(file_path)
+            entry = manifest.get(key)
+            if not force and entry and is_fresh(file_path, entry) and _has_arrow(entry):
+                continue
+
+            df, encoding = read_source(file_path)
+            stat = os.stat(file_path)
+            entry = {
+                'sha256': file_hash(file_path),
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'encoding': encoding,
+                'kind': 'geo' if isinstance(df, gpd.GeoDataFrame) else 'table',
+                'store': _store_path(key, '.parquet'),
+            }
+            df.to_parquet(entry['store'])
+
+            # 표 데이터는 압축하지 않은 Arrow IPC 파일도 저장 (모든 프로세스가 읽기 전용으로 메모리 매핑)
+            if entry['kind'] == 'table':
+                entry['arrow'] = _store_path(key, '.arrow')
+                write_arrow(df, entry['arrow'])
+
+            # WKT geometry 열은 파싱된 GeoParquet을 함께 저장
+            gdf = to_geodataframe(df)
+            if gdf is not None:
+                entry['geo_store'] = _store_path(key, '.geo.parquet')
+                gdf.to_parquet(entry['geo_store'])
+
+            manifest[key] = entry
+            logger.info('built %s -> %s', key, entry['store'])
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+# 저장소에서 읽기: 변환본이 없거나 원본이 바뀌었으면 None (원본 읽기로 대체)
+def load_from_store(file_path, geo=False):
+
+    entry = read_manifest().get(source_key(file_path))
+    if entry is None or not is_fresh(file_path, entry):
+        return None
+
+    path = entry.get('geo_store') if geo else entry['store']
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        if not geo and entry['kind'] == 'table' and _has_arrow(entry):
+            return load_arrow(entry['arrow'])
+        if geo or entry['kind'] == 'geo':
+            return gpd.read_parquet(path)
+        return pd.read_parquet(path)
+    except ImportError:
+        # pyarrow가 없는 환경에서는 원본 파일을 사용
+        return None
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    build_data_store()
@@ -0,0 +1,141 @@
+# -*- coding:utf-8 -*-
+import functools
+import streamlit as st
+from utils.data_store import file_version
+from utils.data_loader import load_data, load_geodata
+from utils.incidents import build_incident_index
+
+# 파일별로 마지막으로 확인한 내용 버전 (처음 확인한 버전이 기준, 달라지면 등록된 함수의 캐시를 비움)
+_SEEN = {}
+
+# 파일 경로 -> 그 파일로 만든 결과를 경로/이름만으로 캐시하는 함수 목록 (depends_on으로 등록)
+_DEPENDENTS = {}
+
+# 필터를 적용한 데이터프레임을 프로세스에 남겨 둘 최대 핸들 수 (기간/조건 조합이 늘어도 메모리를 일정하게 유지)
+RESOLVED_MAX_ENTRIES = 32
+
+
+# 원본 파일의 내용 버전 (sha256 앞 16자리, data_store.file_version), 평소에는 os.stat 한 번으로 확인
+# 이미 확인한 파일의 내용이 바뀌었으면 그 파일에 등록된 함수의 캐시만 비움
+# (로더와 핸들처럼 버전을 키에 넣은 캐시는 키가 달라져서 저절로 새로 계산되고, 다른 파일로 만든 캐시는 그대로 둠)
+def dataset_version(file_path):
+
+    version = file_version(file_path)
+    if _SEEN.setdefault(file_path, version) != version:
+        _SEEN[file_path] = version
+        for function in _DEPENDENTS.get(file_path, []):
+            function.clear()
+    return version
+
+
+# 여러 원본 파일의 (경로, 내용 버전) 튜플 - 캐시 함수의 key 인자로 사용
+def source_key(*file_paths):
+
+    return tuple((file_path, dataset_version(file_path)) for file_path in file_paths)
+
+
+# 원본 파일을 직접 읽는 캐시 함수 등록 (@st.cache_data/@st.cache_resource 위에 붙임)
+# 호출할 때마다 파일 버전을 확인해서 내용이 바뀌었으면 이 함수의 캐시를 비운 뒤 계산
+def depends_on(*file_paths):
+
+    def decorator(function):
+        for file_path in file_paths:
+            _DEPENDENTS.setdefault(file_path, []).append(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            for file_path in file_paths:
+                dataset_version(file_path)
+            return function(*args, **kwargs)
+
+        wrapper.clear = function.clear
+        return wrapper
+
+    return decorator
+
+
+# 리스트/집합 조건값을 캐시 키에 쓸 수 있는 튜플로 변환
+def _freeze(value):
+
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(value)) if isinstance(value, set) else tuple(value)
+    return value
+
+
+# 데이터셋 핸들: 원본 경로, 내용 버전, 적용할 연산(행 필터/열 선택/열 이름 변경)만 들고 다니는 가벼운 객체
+# 캐시 함수에는 데이터프레임 대신 핸들을 넘겨서 키 계산이 데이터 크기와 무관하게 끝나게 함
+# kind: 'table'(load_data), 'geo'(load_geodata), 'incidents'(출동 기록 인덱스 - where의 start/end는 기간)
+class DatasetHandle:
+
+    def __init__(self, file_path, kind='table', encoding=None, version=None, ops=()):
+
+        self.file_path = file_path
+        self.kind = kind
+        self.encoding = encoding
+        self.version = version or dataset_version(file_path)
+        self.ops = tuple(ops)
+
+    def __repr__(self):
+
+        return f'DatasetHandle({self.file_path!r}, {self.kind!r}, version={self.version!r}, ops={self.ops!r})'
+
+    # 캐시 키 (경로, 종류, 인코딩, 버전, 연산)
+    def cache_key(self):
+
+        return (self.file_path, self.kind, self.encoding, self.version, self.ops)
+
+    def _extend(self, *ops):
+
+        return DatasetHandle(self.file_path, self.kind, self.encoding, self.version, self.ops + ops)
+
+    # 열 값 조건 (값이 리스트/튜플이면 포함 여부, None이면 조건 없음)
+    def where(self, **conditions):
+
+        return self._extend(*(('where', column, _freeze(value)) for column, value in conditions.items() if value is not None))
+
+    def select(self, columns):
+
+        return self._extend(('select', tuple(columns)))
+
+    def rename(self, mapping):
+
+        return self._extend(('rename', tuple(mapping.items())))
+
+    # 연산을 적용한 데이터프레임 (같은 핸들은 프로세스당 한 번만 계산, 호출하는 쪽에서 수정하지 않음)
+    def frame(self):
+
+        return resolve_dataset(*self.cache_key())
+
+
+# 핸들의 데이터프레임 계산 (캐시 키는 핸들의 작은 튜플, 가장 오래 쓰지 않은 조합부터 버림)
+@st.cache_resource(max_entries=RESOLVED_MAX_ENTRIES)
+def resolve_dataset(file_path, kind, encoding, version, ops):
+
+    conditions = [(op[1], op[2]) for op in ops if op[0] == 'where']
+    if kind == 'incidents':
+        # 기간과 범주 조건은 출동 기록 인덱스의 이진 탐색/코드 필터로 처리
+        df = build_incident_index(file_path).filter(**dict(conditions))
+        conditions = []
+    elif kind == 'geo':
+        df = load_geodata(file_path)
+    else:
+        df = load_data(file_path, encoding)
+
+    for column, value in conditions:
+        df = df[df[column].isin(value)] if isinstance(value, tuple) else df[df[column] == value]
+    for op in ops:
+        if op[0] == 'select':
+            df = df[list(op[1])]
+        elif op[0] == 'rename':
+            df = df.rename(columns=dict(op[1]))
+    return df
+
+
+# 핸들을 받는 st.cache_data 함수용 해시 함수 (데이터 대신 키만 해시)
+DATASET_HASH_FUNCS = {DatasetHandle: DatasetHandle.cache_key}
+
+
+# 데이터셋 핸들 생성
+def dataset(file_path, kind='table', encoding=None):
+
+    return DatasetHandle(file_path, kind, encoding)
@@ -0,0 +1,81 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+import pandas as pd
+import shapely
+import streamlit as st
+from pyproj import Transformer
+from scipy.signal import fftconvolve
+from utils.incidents import INCIDENTS_PATH, build_incident_index
+from utils.datasets import depends_on
+
+# 거리 계산용 평면 좌표계 (UTM-K, 단위 m)
+PROJECTED_CRS = 'EPSG:5179'
+
+# 밀도 계산용 세부 격자 크기(m) - 500m 격자보다 충분히 작게
+BIN_SIZE = 100
+
+# 가우시안 커널을 자르는 범위 (대역폭의 배수)
+KERNEL_EXTENT = 3
+
+# 가중치 선택지 -> 출동 기록에서 가중치를 계산하는 함수
+HOTSPOT_WEIGHTS = {
+    '화재 건수': lambda df: np.ones(len(df)),
+    '인명피해': lambda df: (df['사망수'] + df['부상자수']).to_numpy(dtype=float),
+    '재산피해금액': lambda df: df['재산피해금액'].to_numpy(dtype=float),
+}
+
+
+# 위경도 -> UTM-K 좌표(m)
+def to_projected(lat, lon):
+
+    transformer = Transformer.from_crs('EPSG:4326', PROJECTED_CRS, always_xy=True)
+    return transformer.transform(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+
+
+# 격자 셀 중심의 UTM-K 좌표와 세부 격자 범위 (프로세스당 한 번 계산)
+@st.cache_resource
+def grid_frame(_grid, key, bin_size=BIN_SIZE):
+
+    centroids = shapely.centroid(np.asarray(_grid.geometry.values))
+    x, y = to_projected(shapely.get_y(centroids), shapely.get_x(centroids))
+    bounds = shapely.bounds(np.asarray(_grid.to_crs(PROJECTED_CRS).geometry.values))
+    x0, y0 = bounds[:, 0].min(), bounds[:, 1].min()
+    shape = (int(np.ceil((bounds[:, 3].max() - y0) / bin_size)), int(np.ceil((bounds[:, 2].max() - x0) / bin_size)))
+    return np.asarray(x), np.asarray(y), (x0, y0), shape
+
+
+# 가중 히스토그램을 가우시안 커널과 FFT로 합성곱한 밀도 면 (단위: km²당 가중치 합)
+# 지점 수와 무관하게 히스토그램 한 번 + FFT 한 번이라 기록이 늘어도 시간이 거의 일정함
+def kde_surface(x, y, weights, origin, shape, bandwidth, bin_size=BIN_SIZE):
+
+    col = np.floor((np.asarray(x) - origin[0]) / bin_size).astype(np.int64)
+    row = np.floor((np.asarray(y) - origin[1]) / bin_size).astype(np.int64)
+    inside = (row >= 0) & (row < shape[0]) & (col >= 0) & (col < shape[1])
+    histogram = np.bincount(row[inside] * shape[1] + col[inside], weights=np.asarray(weights)[inside],
+                            minlength=shape[0] * shape[1]).reshape(shape)
+
+    radius = int(np.ceil(KERNEL_EXTENT * bandwidth / bin_size))
+    offsets = np.arange(-radius, radius + 1) * bin_size
+    kernel_1d = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    kernel = np.outer(kernel_1d, kernel_1d)
+    kernel /= kernel.sum()
+
+    density = fftconvolve(histogram, kernel, mode='same')
+    return np.clip(density, 0, None) / (bin_size / 1000) ** 2
+
+
+# 격자 셀별 화재 밀도 (대역폭, 가중치, 계절/시간대 필터마다 캐시, 출동 기록이 바뀌면 다시 계산)
+# seasons, times는 포함할 계절/시간대 튜플 (None이면 전체)
+@depends_on(INCIDENTS_PATH)
+@st.cache_data
+def grid_hotspot(_grid, key, bandwidth=500, weight='화재 건수', seasons=None, times=None, bin_size=BIN_SIZE):
+
+    incidents = build_incident_index().filter(계절=seasons, 시간대=times).dropna(subset=['위도', '경도'])
+    cell_x, cell_y, origin, shape = grid_frame(_grid, key, bin_size)
+    x, y = to_projected(incidents['위도'].values, incidents['경도'].values)
+    density = kde_surface(x, y, HOTSPOT_WEIGHTS[weight](incidents), origin, shape, bandwidth, bin_size)
+
+    # 셀 중심이 속한 세부 격자의 밀도를 셀 값으로 사용
+    row = np.clip(((cell_y - origin[1]) // bin_size).astype(int), 0, shape[0] - 1)
+    col = np.clip(((cell_x - origin[0]) // bin_size).astype(int), 0, shape[1] - 1)
+    return pd.Series(density[row, col], index=_grid.index, name='화재밀도')
@@ -0,0 +1,119 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.data_loader import LOADER_MAX_ENTRIES, load_data
+from utils.data_store import file_version
+
+INCIDENTS_PATH = "data/화재출동_골든타임.csv"
+
+# 코드 배열로 보관해서 필터에 쓰는 범주형 속성 (순서가 정해진 범주는 그 순서로 표시)
+CATEGORY_COLUMNS = ['계절', '시간대', '시군구명']
+CATEGORY_ORDER = {'계절': ['봄', '여름', '가을', '겨울'], '시간대': ['낮', '밤']}
+
+
+# 화재 출동 기록의 기간별 지표 인덱스: 발생일시를 한 번만 파싱해서 정렬한 뒤 누적합을 저장해서
+# 어떤 기간이든 이진 탐색 두 번과 뺄셈으로 집계 (O(log n)), 기록 필터도 정렬된 배열로 처리
+class IncidentIndex:
+
+    def __init__(self, df):
+
+        times = pd.to_datetime(df['화재발생일시'], format='mixed')
+        order = np.argsort(times.values, kind='stable')
+        self.times = times.values[order].astype('datetime64[ns]').view(np.int64)
+        self.frame = df.iloc[order].reset_index(drop=True)
+
+        # 계절/시간대/시군구명은 범주 목록과 작은 정수 코드 배열로 보관
+        self.categories = {}
+        self.codes = {}
+        for column in CATEGORY_COLUMNS:
+            known = CATEGORY_ORDER.get(column, [])
+            extra = sorted(set(self.frame[column].dropna()) - set(known))
+            values = pd.Categorical(self.frame[column], categories=known + extra)
+            self.categories[column] = list(values.categories)
+            self.codes[column] = values.codes.astype(np.int16)
+
+        # 누적합 앞에 0을 붙여서 [i, j) 구간 합 = cum[j] - cum[i]
+        def prefix(column):
+            return np.r_[0, np.cumsum(self.frame[column].to_numpy(dtype=np.int64))]
+
+        self.cum_count = np.arange(len(self.frame) + 1, dtype=np.int64)
+        self.cum_deaths = prefix('사망수')
+        self.cum_injuries = prefix('부상자수')
+        self.cum_damage = prefix('재산피해금액')
+
+    # 기록이 있는 첫날과 마지막날
+    @property
+    def date_range(self):
+
+        if len(self.times) == 0:
+            return None, None
+        first, last = pd.to_datetime(self.times[[0, -1]])
+        return first.date(), last.date()
+
+    # 날짜 구간 [start, end] (양 끝 포함)에 해당하는 정렬 위치 [i, j)
+    def _bounds(self, start, end):
+
+        lo = pd.Timestamp(start).normalize().value
+        hi = (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).value
+        i, j = np.searchsorted(self.times, [lo, hi], side='left')
+        return i, j
+
+    # 기간 [start, end]의 화재 건수, 인명피해, 재산피해(천원), 건당 재산피해(천원)
+    def window(self, start, end):
+
+        i, j = self._bounds(start, end)
+        count = int(self.cum_count[j] - self.cum_count[i])
+        deaths = int(self.cum_deaths[j] - self.cum_deaths[i])
+        injuries = int(self.cum_injuries[j] - self.cum_injuries[i])
+        damage = int(self.cum_damage[j] - self.cum_damage[i])
+        return {
+            '화재건수': count,
+            '사망': deaths,
+            '부상': injuries,
+            '인명피해': deaths + injuries,
+            '재산피해': damage,
+            '건당재산피해': damage / count if count else 0.0,
+        }
+
+    # 기간 [start, end]와 속성 값(예: 계절=['봄', '여름'])으로 출동 기록 필터링
+    # 기간은 정렬 위치 구간으로 자르고, 속성은 구간 안의 코드 배열에 대한 불리언 마스크로 처리
+    def filter(self, start=None, end=None, **attributes):
+
+        i, j = 0, len(self.times)
+        if start is not None and end is not None:
+            i, j = self._bounds(start, end)
+
+        mask = np.ones(j - i, dtype=bool)
+        for column, values in attributes.items():
+            if values is None:
+                continue
+            wanted = [self.categories[column].index(v) for v in values if v in self.categories[column]]
+            mask &= np.isin(self.codes[column][i:j], wanted)
+
+        if mask.all():
+            return self.frame.iloc[i:j]
+        return self.frame.iloc[i:j][mask]
+
+    # 기간과 전년 동기의 지표 (전년 동기 기록이 없으면 None)
+    def compare(self, start, end):
+
+        prev_start = pd.Timestamp(start) - pd.DateOffset(years=1)
+        prev_end = pd.Timestamp(end) - pd.DateOffset(years=1)
+        first, _ = self.date_range
+        current = self.window(start, end)
+        if first is None or prev_start.date() < first:
+            return current, None
+        return current, self.window(prev_start, prev_end)
+
+
+# 화재 출동 기록으로 기간별 지표/필터 인덱스를 만들어 프로세스 내에서 공유 (파일 내용이 바뀌면 새로 만듦)
+def build_incident_index(file_path=INCIDENTS_PATH):
+
+    return _build_incident_index(file_path, file_version(file_path))
+
+
+@st.cache_resource(max_entries=LOADER_MAX_ENTRIES)
+def _build_incident_index(file_path, version):
+
+    return IncidentIndex(load_data(file_path))
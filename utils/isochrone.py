@@ -0,0 +1,111 @@
+# -*- coding:utf-8 -*-
+import os
+import numpy as np
+import pandas as pd
+import shapely
+import streamlit as st
+from scipy import sparse
+from utils.data_loader import load_data
+from utils.hotspot import grid_frame, to_projected
+from utils.incidents import INCIDENTS_PATH, build_incident_index
+from utils.spatial import FACILITIES_PATH, build_facility_index
+from utils.datasets import depends_on
+
+# 이동 시간 계산용 래스터 셀 크기(m) - 500m 격자를 4등분
+CELL_SIZE = 250
+
+# 등시간 구간(분)
+BANDS = [5, 7, 10]
+
+# 지역별 주행 속도 자료 (선택): 위도, 경도, 속도(km/h) 열을 가진 CSV
+# 파일이 있으면 래스터 셀별 평균 속도로 사용하고, 자료가 없는 셀은 보정 속도를 사용
+SPEED_RASTER_PATH = "data/road_speed.csv"
+
+# 속도별로 프로세스에 남겨 둘 최대 그래프/시뮬레이션 자료 수 (속도 슬라이더의 모든 위치를 쌓아 두지 않음)
+SPEED_MAX_ENTRIES = 4
+
+
+# 출동 기록으로 평균 주행 속도(km/h) 보정: 최근접 소방서/안전센터까지 직선거리 / 출동소요시간
+# 기록이 골든타임(7분) 초과 출동뿐이라 느린 쪽으로 치우쳐 있어 중앙값 대신 상위 25% 지점 사용
+@depends_on(FACILITIES_PATH, INCIDENTS_PATH)
+@st.cache_data
+def calibrated_speed(quantile=0.75):
+
+    incidents = build_facility_index().annotate(build_incident_index().frame)
+    speed = incidents['최근접거리(m)'] / incidents['출동소요시간'] * 3.6
+    return float(np.quantile(speed[incidents['출동소요시간'] > 0], quantile))
+
+
+# 서울 격자 영역을 덮는 CELL_SIZE 래스터: 격자 안에 중심이 있는 셀만 노드로 사용
+@st.cache_resource
+def travel_raster(_grid, key, cell_size=CELL_SIZE):
+
+    _, _, origin, shape = grid_frame(_grid, key, cell_size)
+    cols, rows = np.meshgrid(np.arange(shape[1]), np.arange(shape[0]))
+    x = origin[0] + (cols.ravel() + 0.5) * cell_size
+    y = origin[1] + (rows.ravel() + 0.5) * cell_size
+
+    area = shapely.union_all(np.asarray(_grid.to_crs('EPSG:5179').geometry.values))
+    shapely.prepare(area)
+    mask = shapely.contains_xy(area, x, y)
+
+    node = np.full(shape[0] * shape[1], -1, dtype=np.int64)
+    node[mask] = np.arange(mask.sum())
+    return origin, shape, node.reshape(shape), x[mask], y[mask]
+
+
+# 래스터 셀별 주행 속도(km/h): 기본은 하나의 보정 속도, 속도 자료가 있으면 셀 평균으로 덮어씀
+def speed_raster(_grid, key, speed_kmh, cell_size=CELL_SIZE, path=SPEED_RASTER_PATH):
+
+    origin, shape, node, _, _ = travel_raster(_grid, key, cell_size)
+    speed = np.full(node.max() + 1, float(speed_kmh))
+    if not os.path.exists(path):
+        return speed
+
+    samples = load_data(path)
+    x, y = to_projected(samples['위도'].values, samples['경도'].values)
+    row = ((np.asarray(y) - origin[1]) // cell_size).astype(int)
+    col = ((np.asarray(x) - origin[0]) // cell_size).astype(int)
+    inside = (row >= 0) & (row < shape[0]) & (col >= 0) & (col < shape[1])
+    ids = node[row[inside], col[inside]]
+    valid = ids >= 0
+    total = np.bincount(ids[valid], weights=samples['속도'].values[inside][valid], minlength=len(speed))
+    count = np.bincount(ids[valid], minlength=len(speed))
+    speed[count > 0] = total[count > 0] / count[count > 0]
+    return speed
+
+
+# 8방향 인접 셀을 잇는 그래프 (간선 가중치 = 거리 / 두 셀 평균 속도, 초)
+@st.cache_resource(max_entries=SPEED_MAX_ENTRIES)
+def travel_graph(_grid, key, speed_kmh, cell_size=CELL_SIZE):
+
+    _, shape, node, _, _ = travel_raster(_grid, key, cell_size)
+    speed = speed_raster(_grid, key, speed_kmh, cell_size) / 3.6
+
+    sources, targets, weights = [], [], []
+    rows, cols = shape
+    for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+        # (r, c)와 (r + dr, c + dc) 쌍: 양쪽 모두 래스터 안에 있는 범위만 잘라서 비교
+        c0, c1 = max(0, -dc), cols - max(0, dc)
+        a = node[:rows - dr, c0:c1]
+        b = node[dr:, c0 + dc:c1 + dc]
+        valid = (a >= 0) & (b >= 0)
+        u, v = a[valid], b[valid]
+        length = cell_size * np.hypot(dr, dc)
+        sources.append(u)
+        targets.append(v)
+        weights.append(length / ((speed[u] + speed[v]) / 2))
+
+    u, v, w = np.concatenate(sources), np.concatenate(targets), np.concatenate(weights)
+    n = node.max() + 1
+    return sparse.csr_matrix((np.r_[w, w], (np.r_[u, v], np.r_[v, u])), shape=(n, n))
+
+
+# 등시간 구간별 격자 면적 비율(%) - 셀 면적 가중
+def band_shares(_grid, minutes):
+
+    area = _grid.to_crs('EPSG:5179').area.values
+    bins = np.digitize(minutes.values, BANDS, right=True)
+    shares = np.bincount(bins, weights=area, minlength=len(BANDS) + 1) / area.sum() * 100
+    labels = [f'{BANDS[0]}분 이내'] + [f'{a}~{b}분' for a, b in zip(BANDS[:-1], BANDS[1:])] + [f'{BANDS[-1]}분 초과']
+    return pd.Series(shares.round(1), index=labels, name='면적 비율(%)')
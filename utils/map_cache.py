@@ -0,0 +1,205 @@
+# -*- coding:utf-8 -*-
+import os
+import ast
+import json
+import hashlib
+import inspect
+import importlib.util
+import tempfile
+import functools
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+import streamlit.components.v1 as components
+from utils.datasets import DatasetHandle, source_key
+
+# 지도 HTML 캐시 폴더와 최대 용량 (모든 워커 프로세스가 같은 폴더를 공유)
+MAP_CACHE_DIR = os.environ.get('SEOULFIREDASH_MAP_CACHE_DIR', os.path.join('.cache', 'maps'))
+MAP_CACHE_MAX_BYTES = int(os.environ.get('SEOULFIREDASH_MAP_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# 캐시 형식이 바뀌면 올려서 이전 캐시를 무효화 (코드 변경은 code_fingerprint가 키에 반영하므로 올리지 않아도 됨)
+MAP_CACHE_VERSION = 3
+
+
+# 데이터프레임 내용의 해시 (GeoDataFrame은 geometry를 WKB로 해시)
+def frame_fingerprint(df):
+
+    digest = hashlib.sha256()
+    digest.update(repr(list(df.columns)).encode())
+    if isinstance(df, gpd.GeoDataFrame):
+        digest.update(b''.join(shapely.to_wkb(df.geometry.values)))
+        df = pd.DataFrame(df.drop(columns=df.geometry.name))
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+# 시리즈 내용의 해시 (이름, 자료형, 인덱스와 모든 값 - repr은 중간 값을 생략하므로 쓰지 않음)
+def series_fingerprint(series):
+
+    digest = hashlib.sha256(repr((series.name, str(series.dtype))).encode())
+    digest.update(pd.util.hash_pandas_object(series, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+# 배열 내용의 해시 (자료형과 모양 포함)
+def array_fingerprint(array):
+
+    digest = hashlib.sha256(repr((str(array.dtype), array.shape)).encode())
+    if array.dtype == object:
+        digest.update(pd.util.hash_array(array.ravel()).tobytes())
+    else:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+# 인자를 캐시 키에 넣을 수 있는 값으로 변환
+# 데이터셋 핸들은 (경로, 버전, 연산) 키를 그대로 쓰고, 데이터프레임/시리즈/배열은 내용 해시
+# 리스트/튜플/딕셔너리 안에 든 값도 같은 규칙으로 변환 (json.dumps의 default=str은 repr로 잘린 값을 쓰게 됨)
+def _key_part(value):
+
+    if isinstance(value, DatasetHandle):
+        return {'dataset': value.cache_key()}
+    if isinstance(value, pd.DataFrame):
+        return {'frame': frame_fingerprint(value)}
+    if isinstance(value, pd.Series):
+        return {'series': series_fingerprint(value)}
+    if isinstance(value, np.ndarray):
+        return {'array': array_fingerprint(value)}
+    if isinstance(value, (list, tuple)):
+        return [_key_part(item) for item in value]
+    if isinstance(value, dict):
+        return {str(k): _key_part(v) for k, v in value.items()}
+    return value
+
+
+# (함수, 데이터 버전, 필터 인자)로 만든 캐시 키
+def cache_key(name, args, kwargs):
+
+    payload = json.dumps(
+        [MAP_CACHE_VERSION, name, [_key_part(a) for a in args], {k: _key_part(v) for k, v in sorted(kwargs.items())}],
+        default=str, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# 용량 초과 시 가장 오래 사용하지 않은 파일부터 삭제 (LRU, 사용 시각 = 수정 시각)
+def evict(max_bytes=MAP_CACHE_MAX_BYTES):
+
+    entries = []
+    for entry in os.scandir(MAP_CACHE_DIR):
+        if entry.name.endswith('.html'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+# 캐시에서 HTML을 읽고, 없으면 만들어서 저장 (다른 프로세스와 겹치지 않게 임시 파일 후 교체)
+def get_or_build(key, build):
+
+    path = os.path.join(MAP_CACHE_DIR, f'{key}.html')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        os.utime(path)
+        return html
+    except FileNotFoundError:
+        pass
+
+    html = build()
+    os.makedirs(MAP_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=MAP_CACHE_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(html)
+    os.replace(tmp_path, path)
+    evict()
+    return html
+
+
+# folium 지도를 완성된 HTML 문서로 변환 (범례 등 루트에 추가한 요소 포함)
+def render_map(m):
+
+    return m.get_root().render()
+
+
+# 소스 파일 내용과 그 파일이 import하는 같은 패키지 모듈 이름 (수정 시각이 같으면 다시 읽지 않음)
+@functools.lru_cache(maxsize=None)
+def _read_module(path, mtime_ns, package):
+
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    imported = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            imported.append(node.module)
+        elif isinstance(node, ast.Import):
+            imported.extend(alias.name for alias in node.names)
+    return source, tuple(module for module in imported if module.split('.')[0] == package)
+
+
+# 모듈 이름 -> (소스, import하는 같은 패키지 모듈 이름), 소스 파일이 없으면 빈 문자열
+def _module_source(name, package):
+
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        # 스트림릿 페이지 스크립트(__main__)처럼 import 경로로 찾을 수 없는 모듈
+        return '', ()
+    if spec is None or not spec.origin or not spec.origin.endswith('.py'):
+        return '', ()
+    return _read_module(spec.origin, os.stat(spec.origin).st_mtime_ns, package)
+
+
+# 지도 함수의 코드 해시: 함수 본문과 함수를 정의한 모듈, 그 모듈이 직간접적으로 import하는 같은 패키지 모듈의 소스
+# (색상/범례/PNG/팝업 같은 보조 함수나 가져다 쓰는 상수를 고쳐도 저장된 HTML을 다시 만듦)
+def code_fingerprint(build):
+
+    package = build.__module__.split('.')[0]
+    digest = hashlib.sha256(inspect.getsource(build).encode())
+    seen, pending = set(), [build.__module__]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        source, imported = _module_source(name, package)
+        digest.update(name.encode() + source.encode())
+        pending.extend(imported)
+    return digest.hexdigest()[:12]
+
+
+# 지도를 만드는 함수를 HTML 캐시 함수로 변환: 같은 데이터와 인자면 저장된 HTML을 반환
+# sources: 인자로 받지 않고 함수 안에서 직접 읽는 원본 파일 경로 (내용 버전을 키에 넣어 파일이 바뀌면 다시 만듦)
+# 사용: @cached_map_html 또는 @cached_map_html(sources=(경로, ...))
+def cached_map_html(build=None, *, sources=()):
+
+    if build is None:
+        return functools.partial(cached_map_html, sources=sources)
+
+    # 함수나 함수가 쓰는 모듈의 코드가 바뀌면 키가 달라지도록 코드 해시를 포함
+    name = f'{build.__module__}.{build.__qualname__}:{code_fingerprint(build)}'
+
+    @functools.wraps(build)
+    def wrapper(*args, **kwargs):
+        key = cache_key(name, args + (source_key(*sources),) if sources else args, kwargs)
+        return get_or_build(key, lambda: render_map(build(*args, **kwargs)))
+
+    return wrapper
+
+
+# 캐시된 지도 HTML을 스트림릿에 표시 (기본값은 folium_static과 같은 크기, width=None이면 전체 폭)
+def show_map(html, width=700, height=500):
+
+    components.html(html, height=height + 10, width=width)
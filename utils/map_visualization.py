@@ -1,23 +1,78 @@
 import folium
-import streamlit.components.v1 as components
 import geopandas as gpd
-from folium.plugins import MarkerCluster
-from streamlit_folium import folium_static
+import numpy as np
+import pandas as pd
+from folium.plugins import MarkerCluster, FastMarkerCluster
 import streamlit as st
 from folium.features import DivIcon
+from utils.cluster_index import build_cluster_index
+from utils.raster import render_grid_png
+from utils.binning import binned_grid, SOURCE_PATHS
+from utils.datasets import source_key
+from utils.isochrone import BANDS
+from utils.coverage import COVERAGE_SOURCES, grid_coverage
+from utils.spatial import FACILITIES_PATH, build_facility_index
+from utils.boundary import BOUNDARY_PATH, load_boundary, boundary_level_for_zoom
+from utils.map_cache import cached_map_html
+
+# 비상 소화장치 일괄 렌더링용 마커 생성 함수(JS): row = [위도, 경도, 구, 동]
+_DEVICE_MARKER_CALLBACK = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'info-sign', markerColor: 'red', prefix: 'glyphicon'});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindTooltip(row[2] + ', ' + row[3]);
+    return marker;
+}
+"""
+
+# 서버에서 집계한 클러스터(중심, 건수)를 건수 라벨이 있는 원 마커로 추가
+def add_cluster_markers(m, clusters, color='red'):
+
+    for lat, lon, count in clusters[['위도', '경도', '건수']].itertuples(index=False):
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=8 + 4 * np.log10(count),
+            color=color,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.5,
+            tooltip=f'{count}건'
+        ).add_to(m)
+        folium.Marker(
+            [lat, lon],
+            icon=DivIcon(
+                icon_anchor=(10, 8),
+                html=f'<div style="width: 20px; font-size: 8pt; font-weight: bold; text-align: center; color: #1C1C1C;">{count}</div>',
+            )
+        ).add_to(m)
+
+# 취약지역 점수 지도 툴팁에 표시할 열
+TOOLTIP_FIELDS = [
+    '자치구', '전체 점수', '순위','비상소화장치 설치개수 점수', '서울시 주거 시설 중 주택 비율 점수', '인구밀도(명/km^2) 점수', 
+    '노후 주택 수 점수', '소방관 1명당 담당인구 점수', '화재발생건수 점수', '안전센터 1개소당 담당인구 점수', 
+    '출동소요시간 점수',  '고령자 수 점수'
+]
 
 # 2. 화재사고 취약 페이지 - 서울시 구별 취약지역 점수 지도
-@st.cache_data
-def create_and_show_map(_data, columns, key_on, fill_color='YlOrRd'):
+@cached_map_html(sources=(BOUNDARY_PATH,))
+def create_and_show_map(_data, columns, key_on, fill_color='YlOrRd', zoom_start=11):
+
+    # 경계가 없는 데이터는 줌 레벨에 맞게 단순화된 구 경계(공유 경계 유지)와 '구'-'자치구' 기준으로 병합
+    if 'geometry' not in _data.columns:
+        boundary = load_boundary(boundary_level_for_zoom(zoom_start))
+        _data = boundary.merge(_data, left_on='구', right_on='자치구')
 
     # 서울시 중심부의 위도와 경도로 지도 초기화
-    seoul_map = folium.Map(location=[37.5642135, 127.0016985], zoom_start=11)
+    seoul_map = folium.Map(location=[37.5642135, 127.0016985], zoom_start=zoom_start)
+
+    # 지도에 필요한 속성(키, 값, 툴팁)만 남겨 GeoJSON 크기를 줄임
+    fields = list(dict.fromkeys(columns + [col for col in TOOLTIP_FIELDS if col in _data.columns]))
     
     # Choropleth 레이어 추가
     choropleth = folium.Choropleth(
-        geo_data=_data,
+        geo_data=_data[fields + ['geometry']],
         name='choropleth',
-        data=_data,
+        data=pd.DataFrame(_data[columns]),
         columns=columns,
         key_on=key_on,
         fill_color=fill_color,
@@ -30,11 +85,7 @@ def create_and_show_map(_data, columns, key_on, fill_color='YlOrRd'):
 
     # 툴팁 추가
     choropleth.geojson.add_child(
-        folium.features.GeoJsonTooltip(fields = [
-                                                    '자치구', '전체 점수', '순위','비상소화장치 설치개수 점수', '서울시 주거 시설 중 주택 비율 점수', '인구밀도(명/km^2) 점수', 
-                                                    '노후 주택 수 점수', '소방관 1명당 담당인구 점수', '화재발생건수 점수', '안전센터 1개소당 담당인구 점수', 
-                                                    '출동소요시간 점수',  '고령자 수 점수'
-                                                ],
+        folium.features.GeoJsonTooltip(fields = TOOLTIP_FIELDS,
                                         aliases = [
                                             '자치구', '전체 점수', '비상소화장치 설치개수 점수', '순위', '서울시 주거 시설 중 주택 비율 점수', '인구밀도(명/km^2) 점수', 
                                                     '노후 주택 수 점수', '소방관 1명당 담당인구 점수', '화재발생건수 점수', '안전센터 1개소당 담당인구 점수', 
@@ -69,13 +120,14 @@ def create_and_show_map(_data, columns, key_on, fill_color='YlOrRd'):
             )
         ).add_to(seoul_map)
 
-    # HTML로 변환 후 반환
-    return seoul_map._repr_html_()
+    # 지도 객체 반환 (HTML 변환과 캐시는 cached_map_html에서 처리)
+    return seoul_map
 
-# 3. 서울시 소방 인프라 페이지 - tab1: 서울시 소방서 및 안전센터 시각화
-@st.cache_data
-def create_folium_map(df):
+# 3. 서울시 소방 인프라 페이지 - tab1: 서울시 소방서 및 안전센터 시각화 (data: 구/동 조건을 담은 데이터셋 핸들)
+@cached_map_html
+def create_folium_map(data):
 
+    df = data.frame()
     m = folium.Map(location=[37.5642135, 127.0016985], zoom_start=11)
     colors = {
         '소방서': 'red',
@@ -96,17 +148,43 @@ def create_folium_map(df):
             popup=folium.Popup(popup_content, max_width=300)
         ).add_to(m)
 
-    folium_static(m)
+    return m
 
 # 3. 서울시 소방 인프라 페이지 - tab2: 비상 소화장치 클러스터링 시각화
-def display_folium_map_with_clusters(gdf):
+@cached_map_html
+def display_folium_map_with_clusters(devices, bulk=True, zoom=None):
+
+    # 구/동 조건을 담은 비상소화장치 데이터셋 핸들 -> GeoDataFrame
+    gdf = devices.frame()
+
+    # 서울시 중심 좌표
+    center = [37.5665, 126.9780]
+
+    if zoom is not None:
+        # 줌 레벨별 집계: 미리 만든 클러스터 인덱스에서 선택한 줌 레벨의 클러스터만 전송
+        # 저장한 HTML은 지도를 옮겨도 다시 요청할 수 없어서 화면 영역으로 자르지 않고, 선택한 지역 중심에서 시작
+        index = build_cluster_index(gdf.geometry.y.values, gdf.geometry.x.values)
+        m = folium.Map(location=index.center(center), tiles='OpenStreetMap', zoom_start=zoom)
+        add_cluster_markers(m, index.query(zoom))
+        return m
+
+    # 서울시 중심에 지도를 생성
+    m = folium.Map(location=center, tiles='OpenStreetMap', zoom_start=11)
+
+    if bulk:
+        # 모든 지점을 [위도, 경도, 구, 동] 배열 하나로 보내고, 마커와 클러스터는 브라우저에서 생성
+        points = pd.DataFrame({
+            'lat': gdf.geometry.y.round(6),
+            'lon': gdf.geometry.x.round(6),
+            '구': gdf['구'],
+            '동': gdf['동'],
+        })
+        FastMarkerCluster(points.values.tolist(), callback=_DEVICE_MARKER_CALLBACK).add_to(m)
+        return m
 
-    # 서울시 중심에 지도를 생성하고, CartoDB Positron 타일을 사용
-    m = folium.Map(location=[37.5665, 126.9780], tiles='OpenStreetMap', zoom_start=11)
-    
     # 클러스터 객체 생성
     marker_cluster = MarkerCluster().add_to(m)
-    
+
     # GeoDataFrame 내의 각 지점에 대해 마커 추가
     for idx, row in gdf.iterrows():
         # 마커에 표시될 팝업 및 툴팁 생성
@@ -119,75 +197,260 @@ def display_folium_map_with_clusters(gdf):
             icon=folium.Icon(color='red', icon='info-sign')
         ).add_to(marker_cluster)
     
-    # 스트림릿에서 지도 표시
-    folium_static(m)
+    # 지도 객체 반환 (페이지에서 show_map으로 표시)
+    return m
+
+
+# 소방용수의 양에 따라 색상을 매핑하는 함수
+def fire_water_color(amount):
+    """
+    소방용수의 양에 따라 색상을 매핑하는 함수입니다. 소방용수의 양이 1부터 10까지는 각각 다른 색상을,
+    10 이상, 20 이상, 30 이상에서도 각각 특정 색상을 할당합니다.
+    """
+    if amount == 30:
+        return '#01579B' 
+    elif amount == 20:
+        return '#0277BD' 
+    elif amount == 10:
+        return '#0288D1' 
+    elif amount in[8, 9]:
+        return '#039BE5'
+    elif amount in[6, 7]:
+        return '#03A9F4'  
+    elif amount == 5:
+        return '#29B6F6'  
+    elif amount == 4:
+        return '#4FC3F7'  
+    elif amount == 3:
+        return '#81D4FA'  
+    elif amount == 2:
+        return '#B3E5FC'  
+    elif amount == 1:
+        return '#E1F5FE' 
+    else:
+        return '#808080' 
+
+# 소방용수 범례 항목 (라벨, 색상)
+FIRE_WATER_LEGEND = [('30', '#01579B'), ('20', '#0277BD'), ('10', '#0288D1'), ('8~9', '#039BE5'), ('6~7', '#03A9F4'),
+                     ('5', '#29B6F6'), ('4', '#4FC3F7'), ('3', '#81D4FA'), ('2', '#B3E5FC'), ('1', '#E1F5FE'), ('기타', '#808080')]
+
+# 지도에 고정되는 범례 HTML 요소 생성 (기본 위치: 오른쪽 위)
+def legend_element(title, items, position='top: 10px; right: 10px;'):
+
+    rows = ''.join(
+        f'&nbsp; <i style="background:{color}; width: 12px; height: 12px; display: inline-block;"></i> {label}<br>'
+        for label, color in items
+    )
+    legend_html = f'''
+    <div style="position: fixed; 
+         {position} width: 120px; 
+         background-color: white; border:2px solid rgba(0,0,0,0.2); 
+         z-index:9999; font-size:11px; border-radius: 8px; 
+         box-shadow: 3px 3px 5px rgba(0,0,0,0.3); padding: 8px;">
+         <h4 style="text-align:center; font-size:13px; font-weight: bold; margin-top: 0;">{title}</h4>
+         {rows}
+    </div>
+    '''
+    return folium.Element(legend_html)
+
+# 화재 밀도 핫스팟 색상 (최댓값 대비 비율 구간, 낮은 구간부터) - 5% 미만은 투명
+HOTSPOT_COLORS = ['#ffffb2', '#fecc5c', '#fd8d3c', '#f03b20', '#bd0026']
+HOTSPOT_BREAKS = [0.05, 0.2, 0.4, 0.6, 0.8]
+
+# 셀별 화재 밀도를 색상 목록과 범례 항목으로 변환
+def hotspot_colors(density):
+
+    density = np.asarray(density, dtype=float)
+    peak = density.max() if len(density) and density.max() > 0 else 1.0
+    level = np.searchsorted(HOTSPOT_BREAKS, density / peak, side='right') - 1
+    colors = np.where(level >= 0, np.asarray(HOTSPOT_COLORS)[np.clip(level, 0, None)], '')
+    legend = [(f'{peak * lower:,.1f}~', color) for lower, color in zip(HOTSPOT_BREAKS, HOTSPOT_COLORS)][::-1]
+    return colors.tolist(), legend
 
+# 다시 집계한 격자 색상 (점 수의 분위수 5구간, 파란색 계열) 목록과 범례 항목
+BINNED_COLORS = ['#E1F5FE', '#81D4FA', '#29B6F6', '#0288D1', '#01579B']
+
+def binned_colors(counts):
+
+    counts = np.asarray(counts, dtype=float)
+    breaks = np.unique(np.quantile(counts, [0, 0.2, 0.4, 0.6, 0.8])) if len(counts) else np.array([0.0])
+    level = np.searchsorted(breaks, counts, side='right') - 1
+    colors = np.asarray(BINNED_COLORS)[np.clip(level, 0, len(BINNED_COLORS) - 1)]
+    legend = [(f'{lower:,.0f}~', BINNED_COLORS[i]) for i, lower in enumerate(breaks)][::-1]
+    return colors.tolist(), legend
 
 # 3. 서울시 소방 인프라 페이지 - tab3: 서울시 소방용수 그리드 시각화
-@st.cache_data
-def visualize_fire_water(grid, column_name='소방용수_수'):
+# hotspot(셀별 화재 밀도)을 주면 화재 핫스팟 레이어를 함께 표시하고 레이어 선택 컨트롤 추가
+# resolution(m)을 주면 원본 500m 격자 대신 source 지점을 사각/육각 격자로 다시 집계해서 표시
+@cached_map_html(sources=SOURCE_PATHS)
+def visualize_fire_water(grid, column_name='소방용수_수', raster=False, hotspot=None, resolution=None, shape='square', source='소방용수'):
 
-    # geometry 열을 GeoPandas의 geometry로 변환
-    grid['geometry'] = gpd.GeoSeries.from_wkt(grid['geometry'])
-    gdf = gpd.GeoDataFrame(grid, geometry='geometry')
-    gdf.crs = "EPSG:4326"
+    # 격자 데이터셋 핸들의 GeoDataFrame을 그대로 사용 (캐시된 원본은 수정하지 않음)
+    _grid = grid.frame()
+    gdf = _grid[[column_name, 'geometry']]
 
     # 지도 객체 생성 (서울시 중심 좌표로 설정)
     map_fw = folium.Map(location=[37.564, 126.997], zoom_start=11, tiles='OpenStreetMap')
 
-    # 색상을 결정하는 함수(. 여기서는 단순화를 위해 소방용수의 양에 따라 색상을 분류)
-    @st.cache_data
-    def color_scale(amount):
-        """
-        소방용수의 양에 따라 색상을 매핑하는 함수입니다. 소방용수의 양이 1부터 10까지는 각각 다른 색상을,
-        10 이상, 20 이상, 30 이상에서도 각각 특정 색상을 할당합니다.
-        """
-        if amount == 30:
-            return '#01579B' 
-        elif amount == 20:
-            return '#0277BD' 
-        elif amount == 10:
-            return '#0288D1' 
-        elif amount in[8, 9]:
-            return '#039BE5'
-        elif amount in[6, 7]:
-            return '#03A9F4'  
-        elif amount == 5:
-            return '#29B6F6'  
-        elif amount == 4:
-            return '#4FC3F7'  
-        elif amount == 3:
-            return '#81D4FA'  
-        elif amount == 2:
-            return '#B3E5FC'  
-        elif amount == 1:
-            return '#E1F5FE' 
-        else:
-            return '#808080' 
-
+    if resolution is not None:
+        # 셀이 작을수록 셀당 픽셀 수를 줄여 이미지 크기를 비슷하게 유지
+        binned = binned_grid(source, resolution, shape)
+        colors, legend = binned_colors(binned['수'])
+        pixels_per_cell = int(np.clip(resolution // 50, 2, 8))
+        key = (source, shape, resolution) + source_key(*SOURCE_PATHS)
+        image_url, bounds = render_grid_png(binned.geometry, key, colors, pixels_per_cell)
+        name = f'{source} ({resolution}m)'
+        folium.raster_layers.ImageOverlay(image=image_url, bounds=bounds, opacity=0.7, name=name).add_to(map_fw)
+        map_fw.get_root().html.add_child(legend_element(name, legend))
+        if hotspot is not None:
+            add_hotspot_layer(map_fw, _grid, grid.cache_key(), hotspot)
+        return map_fw
+
+    if raster:
+        # 셀 색상을 한 번 PNG로 그려 이미지 오버레이와 범례로 표시 (셀 폴리곤을 전송하지 않음)
+        colors = [fire_water_color(amount) for amount in gdf[column_name]]
+        image_url, bounds = render_grid_png(gdf.geometry, grid.cache_key(), colors)
+        folium.raster_layers.ImageOverlay(image=image_url, bounds=bounds, opacity=0.7, name=column_name).add_to(map_fw)
+        map_fw.get_root().html.add_child(legend_element(column_name, FIRE_WATER_LEGEND))
+        if hotspot is not None:
+            add_hotspot_layer(map_fw, _grid, grid.cache_key(), hotspot)
+        return map_fw
 
     # GeoPandas DataFrame을 이용하여 지도에 추가
     folium.GeoJson(
         gdf,
+        name=column_name,
         style_function=lambda feature: {
-            'fillColor': color_scale(feature['properties'][column_name]),
+            'fillColor': fire_water_color(feature['properties'][column_name]),
             'color': 'black',
             'weight': 0.1,
             'fillOpacity': 0.7,
         }
     ).add_to(map_fw)
-    # 지도 표시 (스트림릿으로 변환시 st.write(m) 사용)
-    folium_static(map_fw)
+    if hotspot is not None:
+        add_hotspot_layer(map_fw, _grid, grid.cache_key(), hotspot)
+    # 지도 객체 반환 (페이지에서 show_map으로 표시)
+    return map_fw
+
+# 화재 밀도 핫스팟 레이어(PNG 오버레이)와 범례, 레이어 선택 컨트롤 추가
+def add_hotspot_layer(m, _grid, key, hotspot):
+
+    colors, legend = hotspot_colors(hotspot)
+    image_url, bounds = render_grid_png(_grid.geometry, key, colors)
+    folium.raster_layers.ImageOverlay(image=image_url, bounds=bounds, opacity=0.8, name='화재 핫스팟').add_to(m)
+    m.get_root().html.add_child(legend_element('화재 밀도(/km²)', legend, position='bottom: 20px; right: 10px;'))
+    folium.LayerControl(position='topleft').add_to(m)
+
+# 비상소화장치 반경 내 면적 비율 범례 항목 (라벨, 색상)
+COVERAGE_LEGEND = [('80~100%', '#1a9850'), ('60~80%', '#91cf60'), ('40~60%', '#fee08b'),
+                   ('20~40%', '#fc8d59'), ('0~20%', '#d73027'), ('기타', '#808080')]
+
+# 반경 내 면적 비율(0~1)에 따라 색상을 매핑하는 함수 (값이 없으면 회색)
+def coverage_color(share):
+
+    if share != share:
+        return '#808080'
+    for (_, color), lower in zip(COVERAGE_LEGEND, [0.8, 0.6, 0.4, 0.2, 0.0]):
+        if share >= lower:
+            return color
+    return '#808080'
+
+# 3. 서울시 소방 인프라 페이지 - tab4: 비상소화장치 커버리지 격자 시각화 (셀별 반경 내 면적 비율)
+@cached_map_html(sources=COVERAGE_SOURCES)
+def visualize_device_coverage(grid, radius):
+
+    _grid = grid.frame()
+    coverage = grid_coverage(_grid, grid.cache_key(), radius)
+    map_cov = folium.Map(location=[37.564, 126.997], zoom_start=11, tiles='OpenStreetMap')
+
+    # 셀 색상을 PNG 한 장으로 그려 이미지 오버레이로 표시
+    colors = [coverage_color(share) for share in coverage['반경내비율']]
+    image_url, bounds = render_grid_png(_grid.geometry, grid.cache_key(), colors)
+    folium.raster_layers.ImageOverlay(image=image_url, bounds=bounds, opacity=0.7).add_to(map_cov)
+    map_cov.get_root().html.add_child(legend_element(f'반경 {radius}m 내', COVERAGE_LEGEND))
+    return map_cov
+
+# 출동 도달 시간 구간 범례 항목 (라벨, 색상) - isochrone.BANDS(5/7/10분) 기준
+TRAVEL_TIME_LEGEND = [('5분 이내', '#1a9850'), ('5~7분', '#fee08b'), ('7~10분', '#fc8d59'), ('10분 초과', '#d73027')]
+
+# 3. 서울시 소방 인프라 페이지 - tab5: 소방서/안전센터 도달 시간 등시간 격자 시각화
+# closed(운영 중지를 가정한 시설 이름)는 회색 마커로, 나머지 시설은 빨간 점으로, added({이름: (위도, 경도)})는 파란 별로 표시
+# 지도 클릭 위치를 받아야 해서 HTML 캐시 대신 folium 지도 객체를 반환 (st_folium으로 표시)
+def visualize_travel_time(grid, minutes, stations, closed=(), added=None):
+
+    _grid = grid.frame()
+    map_tt = folium.Map(location=[37.564, 126.997], zoom_start=11, tiles='OpenStreetMap')
+
+    # 셀 색상을 PNG 한 장으로 그려 이미지 오버레이로 표시
+    level = np.digitize(np.asarray(minutes, dtype=float), BANDS, right=True)
+    colors = np.asarray([color for _, color in TRAVEL_TIME_LEGEND])[level].tolist()
+    image_url, bounds = render_grid_png(_grid.geometry, grid.cache_key(), colors)
+    folium.raster_layers.ImageOverlay(image=image_url, bounds=bounds, opacity=0.6).add_to(map_tt)
+    map_tt.get_root().html.add_child(legend_element('도달 시간', TRAVEL_TIME_LEGEND))
+
+    for _, row in stations.iterrows():
+        is_closed = row['서ㆍ센터명'] in closed
+        folium.CircleMarker(
+            [row['위도'], row['경도']],
+            radius=6 if is_closed else 3,
+            color='gray' if is_closed else 'red',
+            fill=True,
+            fill_opacity=0.9,
+            tooltip=f"{row['서ㆍ센터명']}{' (운영 중지 가정)' if is_closed else ''}",
+        ).add_to(map_tt)
+
+    for name, (lat, lon) in (added or {}).items():
+        folium.Marker([lat, lon], tooltip=name, icon=folium.Icon(color='blue', icon='star')).add_to(map_tt)
+    return map_tt
+
+# 3. 소방 인프라 분석 페이지 - 좌표별 최근접 시설 조회 지도 (조회 지점은 검은 원, 결과 시설은 대상별 색상의 점과 연결선)
+# 지도 클릭 위치를 받아야 해서 folium 지도 객체를 반환 (st_folium으로 표시)
+NEAREST_COLORS = {'소방서·안전센터': 'red', '비상소화장치': 'orange', '소방용수 격자': 'blue'}
+
+def visualize_nearest_lookup(points, results):
+
+    center = [points['위도'].mean(), points['경도'].mean()] if len(points) else [37.564, 126.997]
+    map_nf = folium.Map(location=center, zoom_start=14 if len(points) else 11)
+
+    for i, row in points.iterrows():
+        folium.CircleMarker([row['위도'], row['경도']], radius=6, color='black', fill=True, fill_opacity=1,
+                            tooltip=f'지점 {i}').add_to(map_nf)
+    for _, row in results.iterrows():
+        color = NEAREST_COLORS.get(row['대상'], 'gray')
+        start = points.loc[row['지점']]
+        folium.PolyLine([[start['위도'], start['경도']], [row['위도'], row['경도']]], color=color, weight=1.5, opacity=0.7).add_to(map_nf)
+        folium.CircleMarker([row['위도'], row['경도']], radius=4, color=color, fill=True, fill_opacity=0.9,
+                            tooltip=f"{row['대상']} {row['순위']}: {row['이름']} ({row['거리(m)']:,}m, {row['방위']}쪽)").add_to(map_nf)
+    map_nf.get_root().html.add_child(legend_element('최근접 시설', list(NEAREST_COLORS.items()) + [('조회 지점', 'black')]))
+    return map_nf
 
 # 3. 소방 인프라 분석 페이지 - 골든타임 초과 시각화 함수(팝업텍스트 생성, 색 생성, 시각화)
-@st.cache_data
-def display_fire_incidents_map(df):
+@cached_map_html(sources=(FACILITIES_PATH,))
+def display_fire_incidents_map(incidents, zoom=None):
 
-    # NaN 값을 가진 행 제거
-    df_filtered = df.dropna(subset=['위도', '경도'])
+    # 기간/계절/시간대 조건을 담은 출동 기록 핸들 -> 가장 가까운 소방서/안전센터 열을 추가한 데이터프레임
+    # (NaN 좌표 행은 annotate에서 제거)
+    df_filtered = build_facility_index().annotate(incidents.frame())
     
+    # 서울의 중심 좌표
+    center = [37.5665, 126.9780]
+
+    if zoom is not None:
+        # 줌 레벨별 집계: 선택한 줌 레벨의 클러스터 중심과 건수만 표시 (조건에 맞는 기록 영역의 중심에서 시작)
+        index = build_cluster_index(df_filtered['위도'].values, df_filtered['경도'].values)
+        map_seoul = folium.Map(location=index.center(center), zoom_start=zoom)
+        add_cluster_markers(map_seoul, index.query(zoom), color='#0078A8')
+        return map_seoul
+
     # 서울의 중심 좌표로 지도 생성
-    map_seoul = folium.Map(location=[37.5665, 126.9780], zoom_start=11)
+    map_seoul = folium.Map(location=center, zoom_start=11)
+
+    # 가장 가까운 소방서/안전센터 정보 (spatial.FacilityIndex.annotate로 열을 추가한 경우만 표시)
+    def nearest_html(row):
+        if '최근접시설' not in row:
+            return ''
+        return (f'<div class="info">최근접 {row["최근접시설유형"]}: {row["최근접시설"]} '
+                f'({row["최근접거리(m)"]:,}m, {row["최근접방위"]}쪽)</div>')
 
     # 팝업 텍스트를 생성하는 함수 (HTML 스타일 적용)
     @st.cache_data
@@ -213,12 +476,13 @@ def display_fire_incidents_map(df):
                 <div class="popup">
                     <div class="title">화재 정보</div>
                     <div class="info">사망수: {row['사망수']}, 부상자수: {row['부상자수']}</div>
-                    <div class="info">재산피해금액: {row['재산피해금액']}만원</div>
+                    <div class="info">재산피해금액: {row['재산피해금액']:,}천원</div>
                     <div class="info">출동소요시간: {row['출동소요시간']}초</div>
                     <div class="info">화재진압시간: {row['화재진압시간']}초</div>
                     <div class="info">위치: {row['시군구명']}, {row['읍면동명']}</div>
                     <div class="info">계절: {row['계절']}, 시간대: {row['시간대']}</div>
                     <div class="info">화재발생일시: {row['화재발생일시']}</div>
+                    {nearest_html(row)}
                 </div>
             </body>
         </html>
@@ -256,12 +520,12 @@ def display_fire_incidents_map(df):
             popup=popup  # 생성된 Popup 객체를 사용
         ).add_to(map_seoul)
     
-    # Streamlit에 지도 표시
-    folium_static(map_seoul, width=800)                        
+    # 지도 객체 반환 (페이지에서 show_map으로 표시)
+    return map_seoul
 
 # 4. 비상소화장치 위치 제안 페이지 - 송파구 비상소화장치 제안 위치 시각화
-@st.cache_data
-def display_fire_extinguisher_map(center, locations, zoom_start=13):
+@cached_map_html
+def display_fire_extinguisher_map(center, locations, zoom_start=13, proposals=None, radius=None):
 
     m = folium.Map(location=center, zoom_start=zoom_start)
 
@@ -288,11 +552,25 @@ def display_fire_extinguisher_map(center, locations, zoom_start=13):
             icon=folium.Icon(color=marker_color, icon="info-sign"),
         ).add_to(m)
 
-    # Streamlit을 사용하여 지도 표시
-    folium_static(m)
+    # 최적화 제안 위치 (placement.optimize_placement 결과): 보라색 마커와 서비스 반경 원으로 함께 표시
+    if proposals is not None and len(proposals) > 0:
+        optimized = folium.FeatureGroup(name='최적화 제안 위치').add_to(m)
+        for _, row in proposals.iterrows():
+            location = [row['위도'], row['경도']]
+            if radius:
+                folium.Circle(location, radius=radius, color='purple', weight=1, fill=True, fill_opacity=0.1).add_to(optimized)
+            folium.Marker(
+                location=location,
+                popup=f"<b>최적화 {row['순위']}순위 ({row['동']})</b><br>{row['위도']:.6f},{row['경도']:.6f}<br>"
+                      f"추가 커버 {row['추가 커버(%)']}%, 누적 {row['누적 커버(%)']}%",
+                icon=folium.Icon(color='purple', icon='star'),
+            ).add_to(optimized)
+
+    # 지도 객체 반환 (페이지에서 show_map으로 표시)
+    return m
 
 # 4. 비상소화장치 위치 제안 페이지 - 하단 tab1: 송파구 현재 비상소화장치 위치 시각화
-@st.cache_data
+@cached_map_html
 def create_fire_equip_map(fire_equip):
 
     map_songpa = folium.Map(location=[37.514543, 127.106597], zoom_start=13)
@@ -339,11 +617,5 @@ def create_fire_equip_map(fire_equip):
     '''
     map_songpa.get_root().html.add_child(folium.Element(legend_html))
 
-    # 기존의 create_fire_equip_map 함수 끝부분에 다음 코드 추가
-    map_songpa.save('map_with_legend.html')  # 지도를 HTML 파일로 저장
-
-    # 스트림릿에서 지도를 표시하는 부분을 아래와 같이 변경
-    with open('map_with_legend.html', 'r', encoding='utf-8') as f:
-        map_html = f.read()
-
-    components.html(map_html, height=600) 
+    # 범례가 포함된 지도 객체 반환 (HTML은 메모리에서 만들어 캐시, 파일로 저장하지 않음)
+    return map_songpa
\ No newline at end of file
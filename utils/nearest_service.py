@@ -0,0 +1,231 @@
+# -*- coding:utf-8 -*-
+import json
+import argparse
+import numpy as np
+import pandas as pd
+import shapely
+import streamlit as st
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from utils.data_loader import load_geodata
+from utils.spatial import FACILITIES_PATH, FacilityIndex, build_facility_index, compass_name
+from utils.coverage import DEVICES_PATH, build_device_index
+from utils.datasets import depends_on
+
+GRID_PATH = "data/seoul_500_grid_water.csv"
+
+# 조회 대상 (HTTP 요청에서 쓰는 키 -> 결과에 표시할 이름)
+LAYERS = {
+    'stations': '소방서·안전센터',
+    'devices': '비상소화장치',
+    'hydrants': '소방용수 격자',
+}
+
+# 한 번의 요청에서 받을 최대 지점 수와 최근접 개수
+MAX_POINTS = 100000
+MAX_K = 20
+
+
+# 소방용수가 있는 500m 격자 셀의 중심점 인덱스 (셀 번호와 소방용수 수 포함)
+def build_hydrant_index(file_path=GRID_PATH):
+
+    grid = load_geodata(file_path)
+    grid = grid[grid['소방용수_수'].fillna(0) > 0]
+    centroids = shapely.centroid(np.asarray(grid.geometry.values))
+    return FacilityIndex(pd.DataFrame({
+        '위도': shapely.get_y(centroids), '경도': shapely.get_x(centroids),
+        '셀': grid['id'].values, '소방용수_수': grid['소방용수_수'].astype(int).values,
+    }))
+
+
+# 시설 행 -> 결과에 표시할 이름
+def _labels(layer, facilities):
+
+    if layer == 'stations':
+        return facilities['서ㆍ센터명'] + ' (' + facilities['유형구분명'] + ')'
+    if layer == 'devices':
+        return facilities['구'] + ' ' + facilities['동']
+    return '격자 ' + facilities['셀'].astype(str) + ' (소방용수 ' + facilities['소방용수_수'].astype(str) + '개)'
+
+
+# 소방서/안전센터, 비상소화장치, 소방용수 격자의 최근접 조회 (인덱스는 생성 시 한 번만 만듦)
+class NearestService:
+
+    def __init__(self):
+
+        self.indexes = {
+            'stations': build_facility_index(),
+            'devices': build_device_index(),
+            'hydrants': build_hydrant_index(),
+        }
+
+    # 지점 배열(위도, 경도)마다 대상별 k개 최근접 시설
+    # 반환: 지점 번호, 대상, 순위, 이름, 시설 위도/경도, 거리(m), 방위를 한 행씩 담은 데이터프레임
+    def query(self, lat, lon, k=3, layers=None):
+
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        frames = []
+        for layer in layers or list(LAYERS):
+            index = self.indexes[layer]
+            indices, distances, bearings = index.query(lat, lon, k=k)
+            rank_count = indices.shape[1]
+            nearest = index.facilities.iloc[indices.ravel()]
+            frames.append(pd.DataFrame({
+                '지점': np.repeat(np.arange(len(lat)), rank_count),
+                '대상': LAYERS[layer],
+                '순위': np.tile(np.arange(1, rank_count + 1), len(lat)),
+                '이름': _labels(layer, nearest).values,
+                '위도': nearest['위도'].values,
+                '경도': nearest['경도'].values,
+                '거리(m)': distances.ravel().round().astype(int),
+                '방위': compass_name(bearings.ravel()),
+            }))
+        return pd.concat(frames, ignore_index=True).sort_values('지점', kind='stable').reset_index(drop=True)
+
+
+# 대시보드 프로세스에서 공유하는 조회 서비스
+@depends_on(FACILITIES_PATH, DEVICES_PATH, GRID_PATH)
+@st.cache_resource
+def build_nearest_service():
+
+    return NearestService()
+
+
+# 위도/경도 배열이 모두 유한하고 범위(위도 -90~90, 경도 -180~180) 안에 있는지 (지점별 불리언)
+def valid_coordinates(lat, lon):
+
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    return np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+
+
+# '위도,경도' 한 줄씩 붙여넣은 텍스트 -> (위도 배열, 경도 배열, 읽지 못한 줄 번호)
+# 숫자가 아니거나 nan/inf, 범위를 벗어난 좌표도 읽지 못한 줄로 처리
+def parse_points(text):
+
+    lat, lon, invalid = [], [], []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            a, b = (float(value) for value in line.replace('\t', ',').split(',')[:2])
+        except ValueError:
+            invalid.append(number)
+            continue
+        if not valid_coordinates(a, b):
+            invalid.append(number)
+            continue
+        lat.append(a)
+        lon.append(b)
+    return np.array(lat), np.array(lon), invalid
+
+
+# HTTP 조회 요청 값 검사 -> (지점 (n, 2) 배열, k, 대상 목록), 잘못된 값이면 응답에 넣을 메시지로 ValueError
+# points: [[위도, 경도], ...] 유한한 숫자, k: 1~MAX_K 정수, layers: None 또는 LAYERS 키 문자열 목록
+def validate_query(points, k, layers):
+
+    try:
+        points = np.asarray(points, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError('points must be [[lat, lon], ...] numbers')
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) == 0:
+        raise ValueError('points must be a non-empty list of [lat, lon] pairs')
+    if len(points) > MAX_POINTS:
+        raise ValueError(f'at most {MAX_POINTS} points')
+    if not valid_coordinates(points[:, 0], points[:, 1]).all():
+        raise ValueError('lat and lon must be finite, with -90 <= lat <= 90 and -180 <= lon <= 180')
+
+    if isinstance(k, bool):
+        raise ValueError(f'k must be an integer with 1 <= k <= {MAX_K}')
+    try:
+        k = int(k)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f'k must be an integer with 1 <= k <= {MAX_K}')
+    if not 1 <= k <= MAX_K:
+        raise ValueError(f'k must be an integer with 1 <= k <= {MAX_K}')
+
+    if layers is None:
+        return points, k, list(LAYERS)
+    if not isinstance(layers, list) or not all(isinstance(layer, str) for layer in layers):
+        raise ValueError(f'layers must be a list of names from {list(LAYERS)}')
+    unknown = [layer for layer in layers if layer not in LAYERS]
+    if unknown:
+        raise ValueError(f'unknown layers: {unknown}')
+    return points, k, layers or list(LAYERS)
+
+
+# HTTP 요청 처리
+# GET  /nearest?lat=37.5&lon=127.0&k=3&layers=stations,devices
+# POST /nearest  {"points": [[위도, 경도], ...], "k": 3, "layers": ["stations"]}
+def make_handler(service):
+
+    class NearestHandler(BaseHTTPRequestHandler):
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        # 검사를 통과한 요청만 조회 (잘못된 값은 400, 조회 중 예상하지 못한 오류는 500으로 항상 응답)
+        def _answer(self, points, k, layers):
+            try:
+                points, k, layers = validate_query(points, k, layers)
+            except ValueError as error:
+                return self._reply(400, {'error': str(error), 'layers': list(LAYERS)})
+            try:
+                result = service.query(points[:, 0], points[:, 1], k, layers)
+            except Exception as error:
+                self.log_error('nearest query failed: %r', error)
+                return self._reply(500, {'error': 'internal error'})
+            self._reply(200, {'results': result.to_dict(orient='records')})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/nearest':
+                return self._reply(404, {'error': 'use /nearest'})
+            query = parse_qs(url.query)
+            try:
+                points = [[float(query['lat'][0]), float(query['lon'][0])]]
+            except (KeyError, ValueError):
+                return self._reply(400, {'error': 'lat and lon are required numbers'})
+            layers = query['layers'][0].split(',') if 'layers' in query else None
+            self._answer(points, query.get('k', ['3'])[0], layers)
+
+        def do_POST(self):
+            if urlparse(self.path).path != '/nearest':
+                return self._reply(404, {'error': 'use /nearest'})
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                if length < 0:
+                    raise ValueError
+                request = json.loads(self.rfile.read(length) or b'{}')
+                points = request['points']
+            except (KeyError, ValueError, TypeError):
+                return self._reply(400, {'error': 'body must be {"points": [[lat, lon], ...], "k": 3}'})
+            self._answer(points, request.get('k', 3), request.get('layers'))
+
+    return NearestHandler
+
+
+# 로컬 조회 서버 실행 (저장소 최상위 폴더에서: python -m utils.nearest_service --port 8765)
+def serve(host='127.0.0.1', port=8765):
+
+    service = NearestService()
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f'nearest facility service on http://{host}:{port}/nearest')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='소방 시설 최근접 조회 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -0,0 +1,163 @@
+# -*- coding:utf-8 -*-
+import re
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.data_loader import load_data, load_geodata, get_locations_data
+from utils.spatial import FacilityIndex
+from utils.coverage import DEVICES_PATH, grid_sample_distances
+from utils.incidents import INCIDENTS_PATH
+from utils.boundary import BOUNDARY_PATH
+from utils.datasets import dataset, depends_on
+
+GRID_PATH = "data/seoul_500_grid_water.csv"
+SONGPA_FIRE_PATH = "data/2020-2022_송파구_동별_화재건수.csv"
+SONGPA_ELDERLY_PATH = "data/2021-2023_송파구_고령자현황.csv"
+
+# 배치 제안에 쓰는 원본 파일 (하나라도 바뀌면 수요점과 제안을 다시 계산)
+PLACEMENT_SOURCES = (GRID_PATH, DEVICES_PATH, INCIDENTS_PATH, BOUNDARY_PATH, SONGPA_FIRE_PATH, SONGPA_ELDERLY_PATH)
+
+# 서울시 전체를 대상으로 할 때의 선택지 이름
+ALL_GU = '서울시 전체'
+
+
+# 행정동 이름 -> 법정동 이름 ('풍납1동' -> '풍납동', '잠실본동' -> '잠실동')
+def legal_dong(name):
+
+    return re.sub(r'(\d+|본)동$', '동', name)
+
+
+# 구 안의 법정동 이름이 붙은 지점(비상소화장치, 출동 기록, 수동 제안 위치) 인덱스
+# 동 경계 자료가 없어서 표본점의 동은 가장 가까운 이름 있는 지점의 동으로 근사
+@depends_on(DEVICES_PATH, INCIDENTS_PATH)
+@st.cache_resource
+def dong_label_index(gu):
+
+    devices = load_geodata(DEVICES_PATH)
+    incidents = load_data(INCIDENTS_PATH)
+    manual = pd.DataFrame(get_locations_data(), columns=['위도', '경도', '동', '사진', '우선순위']).assign(구='송파구')
+    points = pd.concat([
+        pd.DataFrame({'위도': devices.geometry.y, '경도': devices.geometry.x, '구': devices['구'], '동': devices['동']}),
+        incidents[['위도', '경도', '시군구명', '읍면동명']].set_axis(['위도', '경도', '구', '동'], axis=1),
+        manual[['위도', '경도', '구', '동']],
+    ], ignore_index=True)
+    if gu != ALL_GU:
+        points = points[points['구'] == gu]
+    # 행정동/복수 표기('가락본동, 가락1동')도 첫 번째 법정동 이름으로 통일
+    points = points.assign(동=points['동'].str.split(',').str[0].str.strip().map(legal_dong))
+    return FacilityIndex(points)
+
+
+# 값 합계를 1로 정규화 (합이 0이면 0 배열)
+def _normalize(values):
+
+    values = np.asarray(values, dtype=float)
+    total = values.sum()
+    return values / total if total > 0 else np.zeros_like(values)
+
+
+# 법정동별 값을 그 동에 속한 표본점에 균등하게 나눠서 배분
+def _spread_by_dong(dongs, values_by_dong):
+
+    counts = dongs.map(dongs.value_counts())
+    return _normalize(dongs.map(values_by_dong).fillna(0) / counts)
+
+
+# 표본점별 화재 가중치: 송파구는 동별 화재건수(연평균), 그 외는 출동 기록을 가장 가까운 표본점에 집계
+def fire_density(points, gu):
+
+    if gu == '송파구':
+        fires = load_data(SONGPA_FIRE_PATH, encoding='CP949').replace('-', 0)
+        fires['화재건수'] = fires['화재건수'].astype(int)
+        by_dong = fires.groupby(fires['동'].map(legal_dong))['화재건수'].sum() / fires['시점'].nunique()
+        return _spread_by_dong(points['동'], by_dong)
+
+    incidents = load_data(INCIDENTS_PATH)
+    if gu != ALL_GU:
+        incidents = incidents[incidents['시군구명'] == gu]
+    incidents = incidents.dropna(subset=['위도', '경도'])
+    if len(incidents) == 0:
+        return np.zeros(len(points))
+    indices, _, _ = FacilityIndex(points).query(incidents['위도'].values, incidents['경도'].values)
+    return _normalize(np.bincount(indices[:, 0], minlength=len(points)))
+
+
+# 표본점별 노년인구 가중치 (동별 노년인구 자료가 있는 송파구만, 가장 최근 연도)
+def elderly_density(points, gu):
+
+    if gu != '송파구':
+        return np.zeros(len(points))
+    elderly = load_data(SONGPA_ELDERLY_PATH, encoding='CP949')
+    elderly = elderly[elderly['시점'] == elderly['시점'].max()]
+    by_dong = elderly.groupby(elderly['동'].map(legal_dong))['65세이상 인구'].sum()
+    return _spread_by_dong(points['동'], by_dong)
+
+
+# 구 안의 격자 표본점(약 100m 간격)을 후보지이자 수요점으로 사용
+# 수요 가중치 = 면적 + 화재 + 노년인구 (각각 합 1로 정규화), 기존 비상소화장치 반경 안의 점은 0
+@depends_on(*PLACEMENT_SOURCES)
+@st.cache_data
+def demand_points(gu, radius, fire_weight=1.0, elderly_weight=1.0):
+
+    grid = dataset(GRID_PATH, kind='geo')
+    samples, _ = grid_sample_distances(grid.frame(), grid.cache_key())
+    points = samples if gu == ALL_GU else samples[samples['구'] == gu]
+    points = points[['위도', '경도', '거리']].reset_index(drop=True)
+
+    labels = dong_label_index(gu)
+    indices, _, _ = labels.query(points['위도'].values, points['경도'].values)
+    points['동'] = labels.facilities['동'].values[indices[:, 0]]
+
+    weight = (_normalize(np.ones(len(points)))
+              + fire_weight * fire_density(points, gu)
+              + elderly_weight * elderly_density(points, gu))
+    points['가중치'] = np.where(points['거리'] <= radius, 0.0, weight)
+    return points
+
+
+# 탐욕적 최대 커버링: 추가 커버 가중치가 가장 큰 후보를 n번 선택
+# 선택 후에는 새로 커버된 수요점을 커버하는 후보들의 이득만 희소 행렬 곱으로 한 번에 차감 (정확한 갱신)
+def greedy_max_coverage(cover, weight, n):
+
+    cover = cover.tocsr()
+    columns = cover.tocsc()
+    remaining = np.asarray(weight, dtype=float).copy()
+    gains = cover @ remaining
+
+    chosen, chosen_gains = [], []
+    for _ in range(n):
+        best = int(np.argmax(gains))
+        gain = float(gains[best])
+        if gain <= 0:
+            break
+        newly = cover.indices[cover.indptr[best]:cover.indptr[best + 1]]
+        newly = newly[remaining[newly] > 0]
+        gains -= columns[:, newly] @ remaining[newly]
+        remaining[newly] = 0
+        chosen.append(best)
+        chosen_gains.append(gain)
+    return chosen, chosen_gains
+
+
+# 구(또는 서울시 전체)에 비상소화장치 n개를 추가할 위치 제안
+# 반환: 순위, 위도, 경도, 동, 추가 커버 비율(%), 누적 커버 비율(%) - 비율은 커버되지 않은 수요 가중치 합 대비
+@depends_on(*PLACEMENT_SOURCES)
+@st.cache_data
+def optimize_placement(gu, n, radius, fire_weight=1.0, elderly_weight=1.0):
+
+    points = demand_points(gu, radius, fire_weight, elderly_weight)
+    demand = points[points['가중치'] > 0].reset_index(drop=True)
+    columns = ['순위', '위도', '경도', '동', '추가 커버(%)', '누적 커버(%)']
+    if len(demand) == 0:
+        return pd.DataFrame(columns=columns)
+
+    # 후보지(구 안의 모든 표본점) x 수요점(아직 커버되지 않은 표본점) 커버 행렬
+    cover = FacilityIndex(demand).within(points['위도'].values, points['경도'].values, radius)
+    chosen, gains = greedy_max_coverage(cover, demand['가중치'].values, n)
+
+    share = np.asarray(gains) / demand['가중치'].sum() * 100
+    result = points.iloc[chosen][['위도', '경도', '동']].reset_index(drop=True)
+    result.insert(0, '순위', np.arange(1, len(chosen) + 1))
+    result['추가 커버(%)'] = share.round(1)
+    result['누적 커버(%)'] = np.cumsum(share).round(1)
+    return result[columns]
@@ -0,0 +1,72 @@
+# -*- coding:utf-8 -*-
+import io
+import base64
+import numpy as np
+import shapely
+import streamlit as st
+from PIL import Image
+from utils.cluster_index import project, unproject
+
+
+# 격자 셀을 픽셀로 나눈 인덱스 (픽셀별 셀 번호, 셀 밖은 -1)와 이미지 영역 계산
+# 행은 Web Mercator y 기준 등간격이라 Leaflet 이미지 오버레이와 재투영 없이 맞음
+# key는 셀 도형이 바뀌면 함께 바뀌는 값 (데이터셋 핸들의 cache_key 또는 원본 파일 버전을 포함한 튜플)
+@st.cache_resource
+def grid_pixel_index(_cells, key, pixels_per_cell=8):
+
+    geoms = np.asarray(_cells)
+    bounds = shapely.bounds(geoms)
+    minx, miny = bounds[:, 0].min(), bounds[:, 1].min()
+    maxx, maxy = bounds[:, 2].max(), bounds[:, 3].max()
+
+    # 셀 한 변의 길이(경도)를 중앙값으로 추정하여 픽셀 크기 결정
+    cell_width = np.median(bounds[:, 2] - bounds[:, 0])
+    pixel = cell_width / pixels_per_cell
+    width = int(np.ceil((maxx - minx) / pixel))
+
+    (x0, _), (y_top, y_bottom) = project([maxy, miny], [minx, maxx])
+    height = int(np.ceil((y_bottom - y_top) / (pixel / 360)))
+
+    # 픽셀 중심 좌표를 만들고 STRtree로 한 번에 셀을 찾음
+    xs = minx + (np.arange(width) + 0.5) * pixel
+    ys = unproject(x0, y_top + (np.arange(height) + 0.5) * (pixel / 360))[0]
+    lon, lat = np.meshgrid(xs, ys)
+    points = shapely.points(lon.ravel(), lat.ravel())
+
+    pixel_idx, cell_idx = shapely.STRtree(geoms).query(points, predicate='within')
+    index = np.full(width * height, -1, dtype=np.int32)
+    index[pixel_idx] = cell_idx
+
+    south = unproject(x0, y_top + height * (pixel / 360))[0]
+    image_bounds = [[float(south), float(minx)], [float(maxy), float(minx + width * pixel)]]
+    return index.reshape(height, width), image_bounds
+
+
+# '#RRGGBB' 색상 배열 -> (N, 3) uint8
+def hex_to_rgb(colors):
+
+    colors = np.asarray(colors, dtype=str)
+    return np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in colors], dtype=np.uint8).reshape(-1, 3)
+
+
+# 셀별 색상으로 격자 PNG를 만들어 data URL과 이미지 영역 반환 (색상이 ''인 셀은 투명)
+@st.cache_data
+def render_grid_png(_cells, key, colors, pixels_per_cell=8):
+
+    index, image_bounds = grid_pixel_index(_cells, key, pixels_per_cell)
+
+    # 고유 색상만 변환한 뒤 픽셀에 매핑
+    palette, inverse = np.unique(np.asarray(colors, dtype=str), return_inverse=True)
+    visible = palette != ''
+    rgb = hex_to_rgb(np.where(visible, palette, '#000000'))[inverse]
+    alpha = np.where(visible, 255, 0).astype(np.uint8)[inverse]
+
+    image = np.zeros(index.shape + (4,), dtype=np.uint8)
+    inside = index >= 0
+    image[inside, :3] = rgb[index[inside]]
+    image[inside, 3] = alpha[index[inside]]
+
+    buffer = io.BytesIO()
+    Image.fromarray(image, 'RGBA').save(buffer, format='PNG', optimize=True)
+    url = 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+    return url, image_bounds
@@ -0,0 +1,115 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.data_loader import load_data
+from utils.datasets import depends_on
+
+TOTAL_RANK_PATH = "data/total_rank.csv"
+
+# 취약점수 지표와 방향 (1: 값이 클수록 취약, -1: 값이 작을수록 취약)
+INDICATORS = {
+    '비상소화장치 설치개수': -1,
+    '서울시 주거 시설 중 주택 비율': 1,
+    '인구밀도(명/km^2)': 1,
+    '노후 주택 수': 1,
+    '소방관 1명당 담당인구': 1,
+    '화재발생건수': 1,
+    '안전센터 1개소당 담당인구': 1,
+    '출동소요시간': 1,
+    '고령자 수': 1,
+}
+
+
+# 지표 원자료 (자치구 x 지표)
+@depends_on(TOTAL_RANK_PATH)
+@st.cache_data
+def load_indicators(file_path=TOTAL_RANK_PATH):
+
+    df = load_data(file_path, encoding='cp949')
+    return df[['자치구'] + list(INDICATORS)].reset_index(drop=True)
+
+
+# 열(지표)별 순위 점수: 가장 덜 취약한 자치구가 1점, 가장 취약한 자치구가 n점
+# 동점은 같은 점수(낮은 쪽, pandas rank의 method='min'과 같음)
+def rank_scores(values, directions):
+
+    values = np.asarray(values, dtype=float) * np.asarray(directions, dtype=float)
+    ordered = np.sort(values, axis=0)
+    return np.column_stack([
+        np.searchsorted(ordered[:, j], values[:, j], side='left') + 1 for j in range(values.shape[1])
+    ])
+
+
+# 전체 점수에 대한 순위 (점수가 높을수록 1위, 동점은 같은 순위)
+def total_ranks(totals):
+
+    totals = np.asarray(totals, dtype=float)
+    return np.searchsorted(np.sort(-totals), -totals, side='left') + 1
+
+
+# 지표 원자료(자치구 x 지표)에서 지표별 점수, 전체 점수(가중합), 순위 계산
+def score_indicators(indicators, weights=None, directions=None):
+
+    weights = np.ones(len(INDICATORS)) if weights is None else np.asarray(weights, dtype=float)
+    directions = list(INDICATORS.values()) if directions is None else directions
+
+    scores = rank_scores(indicators[list(INDICATORS)].values, directions)
+    totals = scores @ weights
+
+    result = pd.DataFrame(scores, columns=[f'{name} 점수' for name in INDICATORS])
+    result.insert(0, '자치구', indicators['자치구'])
+    result.insert(1, '순위', total_ranks(totals))
+    result.insert(2, '전체 점수', np.round(totals, 2))
+    return result
+
+
+# 가중치와 방향으로 지표별 점수, 전체 점수(가중합), 순위를 다시 계산 (가중치 조합마다 캐시)
+# weights, directions는 INDICATORS 순서의 튜플, 기본값은 total_rank.csv와 같은 순위 합산
+@depends_on(TOTAL_RANK_PATH)
+@st.cache_data
+def score_districts(weights=None, directions=None, file_path=TOTAL_RANK_PATH):
+
+    return score_indicators(load_indicators(file_path), weights, directions)
+
+
+# 가중치 민감도 분석: 디리클레 분포에서 뽑은 가중치 벡터마다 전체 순위를 계산해서 자치구별 순위 분포 요약
+# (표본 x 지표) @ (지표 x 자치구) 행렬곱과 argsort로 한 묶음씩 계산하고 순위 빈도만 누적
+@depends_on(TOTAL_RANK_PATH)
+@st.cache_data
+def weight_sensitivity(n_samples=20000, concentration=1.0, directions=None, chunk=10000, seed=0, file_path=TOTAL_RANK_PATH):
+
+    indicators = load_indicators(file_path)
+    directions = list(INDICATORS.values()) if directions is None else directions
+    scores = rank_scores(indicators[list(INDICATORS)].values, directions).astype(float)
+    n_districts, n_indicators = scores.shape
+
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((n_districts, n_districts), dtype=np.int64)
+    for start in range(0, n_samples, chunk):
+        size = min(chunk, n_samples - start)
+        weights = rng.dirichlet(np.full(n_indicators, concentration), size=size)
+        totals = weights @ scores.T
+
+        # 표본별로 점수가 높은 순서 -> 각 자치구의 순위(1위부터)
+        order = np.argsort(-totals, axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        ranks[np.arange(size)[:, None], order] = np.arange(1, n_districts + 1)
+        counts += np.bincount((np.arange(n_districts) * n_districts + ranks - 1).ravel(),
+                              minlength=n_districts * n_districts).reshape(n_districts, n_districts)
+
+    # 순위 빈도의 누적 분포에서 백분위 순위를 찾음
+    cumulative = np.cumsum(counts, axis=1) / n_samples
+    percentile = lambda q: (cumulative < q).sum(axis=1) + 1
+    base = score_districts(None, tuple(directions), file_path)
+
+    summary = pd.DataFrame({
+        '자치구': indicators['자치구'],
+        '기본 순위': base['순위'].values,
+        '평균 순위': (counts @ np.arange(1, n_districts + 1) / n_samples).round(1),
+        '5% 순위': percentile(0.05),
+        '중앙 순위': percentile(0.5),
+        '95% 순위': percentile(0.95),
+        '상위 5위 확률(%)': (counts[:, :5].sum(axis=1) / n_samples * 100).round(1),
+    })
+    return summary.sort_values(['중앙 순위', '평균 순위']).reset_index(drop=True)
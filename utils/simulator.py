@@ -0,0 +1,199 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import sparse
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+from utils.boundary import BOUNDARY_PATH
+from utils.coverage import DEVICES_PATH, grid_sample_distances
+from utils.datasets import depends_on
+from utils.hotspot import grid_frame, to_projected
+from utils.isochrone import CELL_SIZE, SPEED_MAX_ENTRIES, travel_raster, travel_graph
+from utils.scoring import TOTAL_RANK_PATH, load_indicators, score_indicators
+from utils.spatial import FACILITIES_PATH, build_facility_index
+
+# 골든타임(분): 이 시간 안에 도달하는 인구를 커버된 인구로 봄
+GOLDEN_TIME = 7
+
+# 시뮬레이션으로 바뀌는 지표
+CENTER_INDICATOR = '안전센터 1개소당 담당인구'
+TIME_INDICATOR = '출동소요시간'
+
+
+# 시뮬레이션에 필요한 고정 자료 (세션끼리 공유, 읽기 전용)
+# times: 시설 x 래스터 노드 도달 시간(분), population: 래스터 노드 x 자치구 인구 희소 행렬
+class SimulationBase:
+
+    def __init__(self, _grid, key, speed_kmh, cell_size=CELL_SIZE):
+
+        _, _, node, x, y = travel_raster(_grid, key, cell_size)
+        self.graph = travel_graph(_grid, key, speed_kmh, cell_size)
+        self.tree = cKDTree(np.column_stack([x, y]))
+        self.indicators = load_indicators()
+        self.gus = self.indicators['자치구'].tolist()
+
+        # 시설별 다익스트라 한 번씩 (시설 x 노드 행렬, 시설 위치는 가장 가까운 노드에 연결)
+        self.facilities = build_facility_index().facilities
+        self.times = (dijkstra(self.graph, indices=self.snap(self.facilities['위도'].values, self.facilities['경도'].values))
+                      / 60).astype(np.float32)
+
+        # 자치구 인구 = 안전센터 1개소당 담당인구 x 안전센터 수, 구 안의 격자 표본점에 균등 배분 후 노드별로 합산
+        centers = self.facilities[self.facilities['유형구분명'] == '안전센터']
+        self.center_counts = centers['구'].value_counts().reindex(self.gus, fill_value=0).to_numpy()
+        self.gu_population = self.indicators[CENTER_INDICATOR].to_numpy(dtype=float) * np.maximum(self.center_counts, 1)
+
+        samples, _ = grid_sample_distances(_grid, key)
+        samples = samples[samples['구'].isin(self.gus)]
+        gu_code = pd.Categorical(samples['구'], categories=self.gus).codes
+        per_sample = self.gu_population[gu_code] / np.bincount(gu_code, minlength=len(self.gus))[gu_code]
+        sample_node = self.snap(samples['위도'].values, samples['경도'].values)
+        self.population = sparse.csr_matrix((per_sample, (sample_node, gu_code)), shape=(self.times.shape[1], len(self.gus)))
+
+        # 노드가 속한 자치구 (인구가 가장 많은 구, 인구가 없으면 -1) - 새 시설의 구 판정용
+        self.node_gu = np.where(self.population.getnnz(axis=1) > 0, np.asarray(self.population.argmax(axis=1)).ravel(), -1)
+
+        # 격자 셀 중심이 속한 노드 (지도 표시용)
+        cell_x, cell_y, _, _ = grid_frame(_grid, key, cell_size)
+        self.cell_node = self.tree.query(np.column_stack([cell_x, cell_y]))[1]
+
+    # 위경도 -> 가장 가까운 래스터 노드 번호
+    def snap(self, lat, lon):
+
+        x, y = to_projected(lat, lon)
+        return self.tree.query(np.column_stack([x, y]))[1]
+
+    # 새 지점 한 곳에서의 도달 시간(분) - 다익스트라 한 번
+    def single_source(self, lat, lon):
+
+        node = int(self.snap([lat], [lon])[0])
+        return (dijkstra(self.graph, indices=node) / 60).astype(np.float32), int(self.node_gu[node])
+
+
+# 속도마다 한 번만 만드는 시뮬레이션 자료 (최근에 쓴 SPEED_MAX_ENTRIES개 속도만 보관)
+@depends_on(FACILITIES_PATH, TOTAL_RANK_PATH, DEVICES_PATH, BOUNDARY_PATH)
+@st.cache_resource(max_entries=SPEED_MAX_ENTRIES)
+def build_simulation_base(_grid, key, speed_kmh, cell_size=CELL_SIZE):
+
+    return SimulationBase(_grid, key, speed_kmh, cell_size)
+
+
+# 시설 운영 중지/추가 시뮬레이터 (세션마다 하나, 상태를 바꿀 때 가장 가까운 시설이 바뀐 노드만 다시 계산)
+class StationSimulator:
+
+    def __init__(self, base):
+
+        self.base = base
+        self.names = base.facilities['서ㆍ센터명'].tolist()
+        self.kinds = base.facilities['유형구분명'].tolist()
+        self.gu = pd.Categorical(base.facilities['구'], categories=base.gus).codes.tolist()
+        self.extra = []
+        self.added = {}
+        self.active = np.ones(len(self.names), dtype=bool)
+
+        self.nearest = base.times.argmin(axis=0)
+        self.minutes = base.times.min(axis=0)
+        self.baseline = self.minutes.copy()
+
+    # 시설 번호의 도달 시간 행 (기존 시설은 공유 행렬, 추가 시설은 세션 목록)
+    def _row(self, i):
+
+        return self.base.times[i] if i < len(self.base.times) else self.extra[i - len(self.base.times)]
+
+    # 운영을 멈춘 시설이 가장 가까웠던 노드만 운영 중인 시설 중에서 다시 최솟값을 찾음
+    def close(self, i):
+
+        self.active[i] = False
+        nodes = np.flatnonzero(self.nearest == i)
+        if len(nodes) == 0:
+            return
+        rows = np.vstack([self.base.times[:, nodes]] + [row[nodes] for row in self.extra])
+        rows[~self.active] = np.inf
+        self.nearest[nodes] = rows.argmin(axis=0)
+        self.minutes[nodes] = rows[self.nearest[nodes], np.arange(len(nodes))]
+
+    # 다시 운영하는 시설이 더 가까운 노드만 갱신
+    def open(self, i):
+
+        self.active[i] = True
+        row = self._row(i)
+        closer = row < self.minutes
+        self.nearest[closer] = i
+        self.minutes[closer] = row[closer]
+
+    # 위경도에 새 안전센터 추가 (같은 위치는 다익스트라 결과를 다시 사용)
+    def add(self, name, lat, lon):
+
+        if name not in self.added:
+            row, gu = self.base.single_source(lat, lon)
+            self.extra.append(row)
+            self.names.append(name)
+            self.kinds.append('안전센터')
+            self.gu.append(gu)
+            self.active = np.r_[self.active, False]
+            self.added[name] = len(self.names) - 1
+        if not self.active[self.added[name]]:
+            self.open(self.added[name])
+
+    # 원하는 상태(운영 중지 시설 이름, 추가 시설 {이름: (위도, 경도)})와 현재 상태의 차이만 반영
+    def sync(self, closed=(), added=None):
+
+        added = added or {}
+        for name, (lat, lon) in added.items():
+            self.add(name, lat, lon)
+        wanted = np.array([name not in closed and (i < len(self.base.times) or name in added)
+                           for i, name in enumerate(self.names)])
+        for i in np.flatnonzero(self.active & ~wanted):
+            self.close(i)
+        for i in np.flatnonzero(~self.active & wanted):
+            self.open(i)
+
+    # 격자 셀별 도달 시간(분) - baseline=True면 모든 기존 시설이 운영 중인 상태
+    def grid_minutes(self, baseline=False):
+
+        return (self.baseline if baseline else self.minutes)[self.base.cell_node].astype(float)
+
+    # 자치구별 인구 가중 커버리지, 안전센터 1개소당 담당인구, 출동소요시간 지표와 순위 변화
+    def summary(self, weights=None, directions=None):
+
+        base = self.base
+        population = base.population.T
+        total = np.asarray(population.sum(axis=1)).ravel()
+        share = lambda minutes: population @ (minutes <= GOLDEN_TIME) / total * 100
+
+        # 평균 도달 시간은 변경 전후 모두 도달 가능한 노드만 사용 (어느 시설과도 이어지지 않은 섬은 inf라 inf - inf = NaN이 됨)
+        # 도달할 수 없게 된 노드는 7분 커버리지 변화에만 반영
+        reachable = (np.isfinite(self.baseline) & np.isfinite(self.minutes)).astype(float)
+        reachable_total = population @ reachable
+
+        def mean_time(minutes):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return population @ np.where(reachable > 0, minutes, 0.0) / reachable_total
+
+        # 안전센터 수 변화: 운영 중지한 기존 센터는 빼고, 추가한 센터는 더함
+        kinds = np.asarray(self.kinds)
+        gu = np.asarray(self.gu)
+        is_center = (kinds == '안전센터') & (gu >= 0)
+        counts = base.center_counts - np.bincount(gu[is_center & ~self.active & (np.arange(len(gu)) < len(base.times))],
+                                                  minlength=len(base.gus))
+        counts += np.bincount(gu[is_center & self.active & (np.arange(len(gu)) >= len(base.times))], minlength=len(base.gus))
+
+        # 출동소요시간은 관측값에 인구 가중 평균 도달 시간의 변화(초)를 더해서 근사
+        indicators = base.indicators.copy()
+        indicators[CENTER_INDICATOR] = base.gu_population / np.maximum(counts, 1)
+        indicators[TIME_INDICATOR] = base.indicators[TIME_INDICATOR] + np.nan_to_num(mean_time(self.minutes) - mean_time(self.baseline)) * 60
+
+        before = score_indicators(base.indicators, weights, directions)
+        after = score_indicators(indicators, weights, directions)
+        result = pd.DataFrame({
+            '자치구': base.gus,
+            '7분 커버리지(%)': share(self.baseline).round(1),
+            '7분 커버리지 변화(%p)': (share(self.minutes) - share(self.baseline)).round(1),
+            CENTER_INDICATOR: base.indicators[CENTER_INDICATOR].round().astype(int),
+            f'{CENTER_INDICATOR} 변화': (indicators[CENTER_INDICATOR] - base.indicators[CENTER_INDICATOR]).round().astype(int),
+            f'{TIME_INDICATOR}(초)': base.indicators[TIME_INDICATOR].round(1),
+            f'{TIME_INDICATOR} 변화(초)': (indicators[TIME_INDICATOR] - base.indicators[TIME_INDICATOR]).round(1),
+            '순위': before['순위'],
+            '변경 후 순위': after['순위'],
+        })
+        return result.sort_values('7분 커버리지 변화(%p)').reset_index(drop=True)
@@ -0,0 +1,111 @@
+# -*- coding:utf-8 -*-
+import numpy as np
+import streamlit as st
+from scipy import sparse
+from sklearn.neighbors import BallTree
+from utils.data_loader import load_data
+from utils.datasets import depends_on
+
+FACILITIES_PATH = "data/서울시_소방시설_좌표_구동.csv"
+
+# 출동 거점으로 보는 시설 유형 (구조대/항공대/특수대응단 제외)
+STATION_TYPES = ('소방서', '안전센터')
+
+# 지구 평균 반지름(m) - haversine 거리(라디안)를 미터로 변환
+EARTH_RADIUS_M = 6371008.8
+
+# BallTree 잎 크기: 시설이 수백 개 수준이라 기본값(40)보다 작게 해야 질의가 빠름
+LEAF_SIZE = 5
+
+# 한 번에 질의할 지점 수 (수백만 지점도 메모리를 일정하게 유지)
+QUERY_BATCH = 200000
+
+# 8방위 이름 (북에서 시계 방향)
+COMPASS = ['북', '북동', '동', '남동', '남', '남서', '서', '북서']
+
+
+# 시작점에서 도착점을 바라보는 방위각(도, 북=0 시계 방향)
+def bearing(lat1, lon1, lat2, lon2):
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    dlon = lon2 - lon1
+    x = np.sin(dlon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+
+# 방위각 -> 8방위 이름
+def compass_name(degrees):
+
+    return np.asarray(COMPASS)[np.round(np.asarray(degrees) / 45).astype(int) % 8]
+
+
+# 시설 좌표의 BallTree(haversine) 인덱스: 여러 지점의 k개 최근접 시설을 배치로 질의
+class FacilityIndex:
+
+    def __init__(self, facilities):
+
+        self.facilities = facilities.dropna(subset=['위도', '경도']).reset_index(drop=True)
+        self.lat = self.facilities['위도'].to_numpy(dtype=float)
+        self.lon = self.facilities['경도'].to_numpy(dtype=float)
+        self.tree = BallTree(np.radians(np.column_stack([self.lat, self.lon])), metric='haversine', leaf_size=LEAF_SIZE)
+
+    # 지점별 k개 최근접 시설의 번호, 거리(m), 방위각(도) - 각각 (n, k) 배열
+    def query(self, lat, lon, k=1, batch=QUERY_BATCH):
+
+        points = np.radians(np.column_stack([np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)]))
+        k = min(k, len(self.facilities))
+        distances = np.empty((len(points), k))
+        indices = np.empty((len(points), k), dtype=np.int64)
+        for start in range(0, len(points), batch):
+            stop = start + batch
+            distances[start:stop], indices[start:stop] = self.tree.query(points[start:stop], k=k)
+
+        bearings = bearing(np.asarray(lat, dtype=float)[:, None], np.asarray(lon, dtype=float)[:, None],
+                           self.lat[indices], self.lon[indices])
+        return indices, distances * EARTH_RADIUS_M, bearings
+
+    # 지점별 반경(m) 안에 있는 시설을 희소 행렬(지점 x 시설, 값 1)로 반환
+    def within(self, lat, lon, radius):
+
+        points = np.radians(np.column_stack([np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)]))
+        neighbors = self.tree.query_radius(points, r=radius / EARTH_RADIUS_M)
+        indptr = np.r_[0, np.cumsum([len(n) for n in neighbors])]
+        indices = np.concatenate(neighbors) if len(neighbors) else np.empty(0, dtype=np.int64)
+        return sparse.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(points), len(self.facilities)))
+
+    # 데이터프레임의 각 행(위도, 경도)에 가장 가까운 시설 이름, 유형, 거리, 방위 열을 추가
+    def annotate(self, df):
+
+        df = df.dropna(subset=['위도', '경도'])
+        indices, distances, bearings = self.query(df['위도'].values, df['경도'].values)
+        nearest = self.facilities.iloc[indices[:, 0]]
+        return df.assign(**{
+            '최근접시설': nearest['서ㆍ센터명'].values,
+            '최근접시설유형': nearest['유형구분명'].values,
+            '최근접거리(m)': distances[:, 0].round().astype(int),
+            '최근접방위': compass_name(bearings[:, 0]),
+        })
+
+
+# 소방서/안전센터 인덱스를 프로세스당 한 번 만들어 공유
+@depends_on(FACILITIES_PATH)
+@st.cache_resource
+def build_facility_index(file_path=FACILITIES_PATH, types=STATION_TYPES):
+
+    df = load_data(file_path)
+    return FacilityIndex(df[df['유형구분명'].isin(types)])
+
+
+# 자치구별 최근접 시설 거리 요약 (annotate 결과 사용)
+def nearest_station_summary(df, gu_column='시군구명'):
+
+    summary = df.groupby(gu_column).agg(
+        출동건수=('최근접거리(m)', 'size'),
+        평균거리=('최근접거리(m)', 'mean'),
+        최대거리=('최근접거리(m)', 'max'),
+        평균출동소요시간=('출동소요시간', 'mean'),
+    )
+    summary = summary.round({'평균거리': 0, '평균출동소요시간': 0}).astype(int)
+    summary.columns = ['출동 건수', '평균 거리(m)', '최대 거리(m)', '평균 출동소요시간(초)']
+    return summary.sort_values('평균 거리(m)', ascending=False)
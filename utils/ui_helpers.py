@@ -1,4 +1,5 @@
 import streamlit as st
+from utils.scoring import INDICATORS
 
 # 0. 모든 페이지 - 사이드바에 페이지 링크 추가
 @st.cache_data
@@ -46,6 +47,19 @@ def display_season_colors():
 
     
 
+# 0. 여러 페이지 - 선택한 탭만 계산해서 보여주는 지연 탭 (st.tabs는 모든 탭을 미리 그리므로 가로 라디오로 대체)
+def lazy_tabs(labels, key):
+
+    return st.radio('탭 선택', labels, horizontal=True, key=key, label_visibility='collapsed')
+
+# 3. 소방 인프라 분석 페이지 - 지도 표시 방식(개별 위치/줌 레벨별 집계) 선택, 집계 시 줌 레벨 반환
+def select_cluster_zoom(key):
+
+    mode = st.radio('표시 방식', ['개별 위치', '줌 레벨별 집계'], horizontal=True, key=f'{key}_mode')
+    if mode == '개별 위치':
+        return None
+    return st.select_slider('줌 레벨', options=list(range(10, 17)), value=11, key=f'{key}_zoom')
+
 # 3,4 페이지 버튼 스타일 html 함수 
 @st.cache_data
 def create_html_button(button_text):
@@ -82,3 +96,18 @@ def show_location_info(st, location_number, location_details, images):
         for img_path, caption in images:
             st.image(img_path, caption=caption, width=400)
 
+
+# 2. 화재사고 취약지역 페이지 - 지표별 가중치(0~3)와 방향 선택, INDICATORS 순서의 튜플 두 개 반환
+def select_indicator_weights():
+
+    weights, directions = [], []
+    for name, direction in INDICATORS.items():
+        col_weight, col_direction = st.columns([3, 2])
+        with col_weight:
+            weights.append(st.slider(name, 0.0, 3.0, 1.0, step=0.5, key=f'weight_{name}'))
+        with col_direction:
+            default = '높을수록 취약' if direction > 0 else '낮을수록 취약'
+            choice = st.selectbox('방향', ['높을수록 취약', '낮을수록 취약'], index=0 if direction > 0 else 1,
+                                  key=f'direction_{name}', label_visibility='hidden', help=f'기본값: {default}')
+        directions.append(1 if choice == '높을수록 취약' else -1)
+    return tuple(weights), tuple(directions)
@@ -3,12 +3,91 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px 
 from plotly.subplots import make_subplots
+from utils.ui_helpers import lazy_tabs
+from utils.datasets import DATASET_HASH_FUNCS
+
+# 1. 서울시 화재사고 현황 페이지 - 메트릭 카드용 증감 문자열 ('- 64건', '+ 17.79억'), 비교 기간이 없으면 None
+def format_delta(current, previous, fmt):
+
+    if previous is None:
+        return None
+    diff = current - previous
+    return f"{'+' if diff >= 0 else '-'} {fmt(abs(diff))}"
+
+# 1. 서울시 화재사고 현황 페이지 - 기간별 골든타임 초과 출동 지표 메트릭 카드 (전년 동기 대비)
+# 출동 기록은 골든타임(7분)을 넘긴 건물화재 출동만 담고 있어 서울시 전체 화재 건수가 아님, 재산피해 단위는 천원
+def display_incident_metrics(current, previous, record_range=None):
+
+    count = lambda v: f'{v:,}건'
+    people = lambda v: f'{v:,}명'
+    eok = lambda v: f'{v / 100000:,.2f}억'
+    won = lambda v: f'{v:,.0f} 천원'
+    prev = lambda key: None if previous is None else previous[key]
+    prev_text = lambda text: '전년동기: 자료 없음' if previous is None else f'전년동기: {text}'
+
+    col1, col2, col3, col4 = st.columns([1,1,1,1])
+
+    with col1: # 메트릭 1 - 골든타임 초과 출동 건수
+        with st.container(height=130, border=True):
+            st.metric(label="**골든타임 초과 출동 🔥**", value=count(current['화재건수']),
+                      delta=format_delta(current['화재건수'], prev('화재건수'), count), delta_color="inverse",
+                      help=prev_text(previous and count(previous['화재건수'])))
+
+    with col2: # 메트릭 2 - 인명피해
+        with st.container(height=130, border=True):
+            st.metric(label="**인명피해 🚑**", value=people(current['인명피해']),
+                      delta=format_delta(current['인명피해'], prev('인명피해'), people), delta_color="inverse",
+                      help=f"사망자 수 {current['사망']}명, 부상자 수 {current['부상']}명 | "
+                           + prev_text(previous and f"인명피해 {previous['인명피해']}명, 사망자 수 {previous['사망']}명, 부상자 수 {previous['부상']}명"))
+
+    with col3: # 메트릭 3 - 총 재산 피해
+        with st.container(height=130, border=True):
+            st.metric(label="**총 재산피해 💸**", value=eok(current['재산피해']),
+                      delta=format_delta(current['재산피해'], prev('재산피해'), eok), delta_color="inverse",
+                      help=f"총 재산피해 {current['재산피해']:,} 천원 | "
+                           + prev_text(previous and f"총 재산피해 {previous['재산피해']:,} 천원"))
+
+    with col4: # 메트릭 4 - 재산 피해/건당
+        with st.container(height=130, border=True):
+            st.metric(label="**재산 피해/건당 💰**", value=won(current['건당재산피해']),
+                      delta=format_delta(current['건당재산피해'], prev('건당재산피해'), won), delta_color="inverse",
+                      help=prev_text(previous and won(previous['건당재산피해'])))
+
+    # 지표의 출처와 범위 안내 (전년 동기 기록이 없으면 증감 대신 '자료 없음')
+    period = f" ({record_range[0]} ~ {record_range[1]})" if record_range and record_range[0] is not None else ''
+    st.caption(f"출동 기록 자료{period}는 골든타임(7분)을 넘겨 도착한 건물화재 출동만 담고 있어 서울시 전체 화재 건수와 다릅니다. "
+               "재산피해는 천원 단위 자료를 억 원으로 환산해 표시하며, 전년 동기 기록이 없으면 증감을 표시하지 않습니다.")
+
+# 1. 서울시 화재사고 현황 페이지 - '18_화재건수' 형태의 넓은 표를 (자치구, 연도, 지표) 인덱스의 긴 표로 한 번에 변환
+@st.cache_data
+def build_trend_table(df):
+
+    value_columns = df.columns[df.columns.str.match(r'^\d{2}_')]
+    long_df = df.melt(id_vars='자치구', value_vars=value_columns, var_name='열', value_name='값')
+
+    # '18_화재건수' -> 연도 '2018', 지표 '화재건수'
+    parts = long_df['열'].str.split('_', n=1, expand=True)
+    long_df['연도'] = '20' + parts[0]
+    long_df['지표'] = parts[1]
+    return long_df.set_index(['자치구', '연도', '지표'])['값'].sort_index()
+
+# 1. 서울시 화재사고 현황 페이지 - 지표 하나의 추세 그래프 (탭을 다시 열 때는 캐시된 그래프 사용)
+@st.cache_data
+def build_trend_figure(df, column, districts, title, height):
+
+    new_df = build_trend_table(df).xs(column, level='지표').loc[list(districts)].rename(column).reset_index()
+    fig = px.line(new_df, x='연도', y=column, color='자치구', title=title)
+    fig.update_layout(height=height)
+    return fig
 
 # 1. 서울시 화재사고 현황 페이지 - 각 탭, 범위별 추세 시각화
 def visualize_trend_by_district_with_tabs(df):
 
     columns = ['화재건수', '사망', '부상', '인명피해 계', '부동산피해(천원)', '동산피해(천원)', '재산피해(천원)', '재산피해/건당(천원)']
-    years = [f'{year}' for year in range(18, 24)]  # 연도 리스트 (2018-2023)
+
+    # 긴 표는 한 번만 만들고 각 탭은 지표별로 잘라서 사용
+    years = build_trend_table(df).index.get_level_values('연도')
+    period = f'({years.min()}-{years.max()})'
 
     selected_districts = []
 
@@ -16,7 +95,7 @@ def visualize_trend_by_district_with_tabs(df):
         option = st.radio("**화재 추세 분석**", ("서울시 전체", "각 구별로 비교하기"), horizontal=True)
 
         if option == "서울시 전체":
-            df = df[df['자치구'] == '서울시']
+            districts = ['서울시']
         else:
             districts_options = df['자치구'].unique().tolist()
             if '서울시' in districts_options:
@@ -28,61 +107,54 @@ def visualize_trend_by_district_with_tabs(df):
                 st.error('적어도 하나 이상의 자치구를 선택해야 합니다.', icon="🚨")
                 return
                 
-            df = df[df['자치구'].isin(selected_districts)]
+            districts = selected_districts
 
         if selected_districts or option == "서울시 전체":
-            tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(columns)
-            tabs = [tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8]
-
-            for tab, column in zip(tabs, columns):
-                with tab:
-                    data_list = []
-                    for year in years:
-                        for index, row in df.iterrows():
-                            data_list.append({'자치구': row['자치구'], '연도': f'20{year}', column: row[f'{year}_{column}']})
-
-                    new_df = pd.DataFrame(data_list)
-                    if option == "서울시 전체" and column == "화재건수":
-                        title = f'서울시 전체 {column} 추세 (2018-2023)'
-                        fig = px.line(new_df, x='연도', y=column, color='자치구', title=title)
-                        fig.update_layout(height=350)
-                    
-                        
-                        # 화재건수를 선택했을 때만 열 2개로 나눠서 그래프와 이미지 표시
-                        col1, col2 = st.columns([4,5])
-                        with col1:
-                            st.plotly_chart(fig, use_container_width=True)
-                        with col2:
-                            st.markdown('**2024년 서울시 월별 화재건수 예측**')
-                            st.image('data/사진/2024_서울시_월별화재건수_예측.png')
-                    else:
-                        # 화재건수가 아닌 다른 탭이나 "각 구별로 비교하기" 선택 시 단독으로 그래프 표시
-                        title = f'{("서울시 전체 " if option == "서울시 전체" else "")}{column} 추세 (2018-2023)'
-                        fig = px.line(new_df, x='연도', y=column, color='자치구', title=title)
-                        fig.update_layout(height=400)
-                        st.plotly_chart(fig, use_container_width=True)
-
+            # 선택한 탭의 그래프만 계산해서 표시
+            column = lazy_tabs(columns, key='trend_tab')
+            if option == "서울시 전체" and column == "화재건수":
+                title = f'서울시 전체 {column} 추세 {period}'
+                fig = build_trend_figure(df, column, tuple(districts), title, height=350)
+            
+                
+                # 화재건수를 선택했을 때만 열 2개로 나눠서 그래프와 이미지 표시
+                col1, col2 = st.columns([4,5])
+                with col1:
+                    st.plotly_chart(fig, use_container_width=True)
+                with col2:
+                    st.markdown('**2024년 서울시 월별 화재건수 예측**')
+                    st.image('data/사진/2024_서울시_월별화재건수_예측.png')
+            else:
+                # 화재건수가 아닌 다른 탭이나 "각 구별로 비교하기" 선택 시 단독으로 그래프 표시
+                title = f'{("서울시 전체 " if option == "서울시 전체" else "")}{column} 추세 {period}'
+                fig = build_trend_figure(df, column, tuple(districts), title, height=400)
+                st.plotly_chart(fig, use_container_width=True)
+
+
+# 1. 서울시 화재사고 현황 페이지 - 자치구의 동 목록 (구 합계 '전체'는 서울시 전체에서만 선택)
+def place_type_dongs(cube, selected_gu):
+
+    dongs = cube.loc[selected_gu].index.get_level_values('동').unique().tolist()
+    if selected_gu != '서울시 전체':
+        dongs.remove('전체')
+    return dongs
 
 # 1. 서울시 화재사고 현황 페이지 - 장소유형별 트리맵 시각화 함수
-def display_treemap(df):
+def display_treemap(cube):
 
     col1, col2 = st.columns(2)
 
     with col1:
         # '자치구' 선택을 위한 스트림릿 셀렉트박스 구현
-        selected_gu = st.selectbox('자치구 선택', options=df['자치구'].unique(), key='자치구_select')
-        # 선택된 '자치구'에 해당하는 데이터만 필터링
-        df_filtered_by_gu = df[df['자치구'] == selected_gu]
+        selected_gu = st.selectbox('자치구 선택', options=cube.index.levels[0], key='자치구_select')
 
     with col2:
         # '동' 선택을 위한 스트림릿 셀렉트박스 구현, 선택된 '자치구'에 해당하는 '동'만을 옵션으로 제공
-        selected_dong = st.selectbox('동 선택', options=df_filtered_by_gu['동'].unique(), key='동_select_dong')
-        # 선택된 '동'에 해당하는 데이터만 최종 필터링
-        df_filtered_by_dong = df_filtered_by_gu[df_filtered_by_gu['동'] == selected_dong]
+        dong_options = place_type_dongs(cube, selected_gu)
+        selected_dong = st.selectbox('동 선택', options=dong_options, key='동_select_dong')
 
-    # 화재 발생 장소 유형별로 화재 발생 건수 집계
-    df_agg = df_filtered_by_dong.melt(id_vars=['자치구', '동'], value_vars=df.columns[3:], var_name='장소 유형', value_name='건수')
-    df_agg = df_agg.groupby(['자치구', '동', '장소 유형']).sum().reset_index()
+    # 큐브에서 선택한 (자치구, 동)의 장소 유형별 건수를 잘라옴
+    df_agg = cube.loc[(selected_gu, selected_dong)].reset_index().assign(자치구=selected_gu, 동=selected_dong)
 
     # 건수가 0 이상인 데이터만 필터링
     df_agg = df_agg[df_agg['건수'] > 0]
@@ -103,7 +175,7 @@ def display_treemap(df):
     st.plotly_chart(fig, use_container_width=True)
 
 # 1. 서울시 화재사고 현황 페이지 - 자치구별 장소유형 막대그래프 시각화 함수
-def visualize_facilities(df_selected):
+def visualize_facilities(cube, selected_gu):
 
     fig = go.Figure()
 
@@ -111,19 +183,19 @@ def visualize_facilities(df_selected):
     facility_types = ['단독주택', '공동주택', '기타주택', '학교', '일반업무', '판매시설', '숙박시설', '종교시설', '의료시설', '공장 및 창고', '작업장', '위락오락시설', '음식점', '일상서비스시설', '기타']
     color_map = dict(zip(facility_types, colors))
 
-    for column in df_selected.columns[2:]:  # '자치구'와 '동' 컬럼을 제외한 나머지 컬럼에 대해 반복
-        total = df_selected[column].sum()  # 해당 시설 유형의 총합
-        # 시설 유형별로 지정된 색상 사용, 레전드 표시하지 않음
-        fig.add_trace(go.Bar(x=[column], y=[total], marker_color=color_map.get(column), showlegend=False))
+    # 큐브의 구 합계(동='전체')를 잘라 막대 하나의 trace로 표시, 시설 유형별로 지정된 색상 사용
+    totals = cube.loc[(selected_gu, '전체')]
+    fig.add_trace(go.Bar(x=totals.index.astype(str), y=totals.values,
+                         marker_color=[color_map.get(column) for column in totals.index], showlegend=False))
 
     fig.update_layout(title="시설 유형별 총계", xaxis_title="시설 유형", yaxis_title="총계")
     st.plotly_chart(fig, use_container_width=True)
 
-# 2. 화재사고 취약지역 페이지 - 전체보기탭: 가로 막대그래프 시각화 함수
-@st.cache_data
-def visualize_vertical_bar_chart(df, selected_column, title, color_scale='Reds'):
+# 2. 화재사고 취약지역 페이지 - 전체보기탭: 가로 막대그래프 시각화 함수 (data: 데이터셋 핸들, 캐시 키는 핸들의 버전/연산)
+@st.cache_data(hash_funcs=DATASET_HASH_FUNCS)
+def visualize_vertical_bar_chart(data, selected_column, title, color_scale='Reds'):
 
-    df_sorted = df.sort_values(by=selected_column, ascending=False)
+    df_sorted = data.frame().sort_values(by=selected_column, ascending=False)
     
     fig = px.bar(df_sorted, x='자치구', y=selected_column,
                  labels={'자치구': '자치구', selected_column: selected_column},
@@ -175,6 +247,25 @@ def visualize_top_districts_with_seoul_average(df, column_name='비상소화장
     # 스트림릿에 그래프 표시
     st.plotly_chart(fig, use_container_width=True)
 
+# 2. 화재사고 취약지역 페이지 - 가중치 민감도: 자치구별 중앙 순위와 5~95% 순위 범위
+def visualize_rank_sensitivity(summary):
+
+    fig = go.Figure(go.Scatter(
+        x=summary['중앙 순위'], y=summary['자치구'], mode='markers',
+        error_x=dict(type='data', symmetric=False,
+                     array=summary['95% 순위'] - summary['중앙 순위'],
+                     arrayminus=summary['중앙 순위'] - summary['5% 순위']),
+        marker=dict(size=10, color=summary['상위 5위 확률(%)'], colorscale='Reds', showscale=True,
+                    colorbar=dict(title='상위 5위<br>확률(%)')),
+        customdata=summary[['평균 순위', '상위 5위 확률(%)']],
+        hovertemplate='%{y}: 중앙 %{x}위, 평균 %{customdata[0]}위, 상위 5위 확률 %{customdata[1]}%<extra></extra>',
+    ))
+    fig.update_layout(title='가중치에 따른 자치구별 순위 범위 (5%~95%)', xaxis_title='순위', height=600,
+                      plot_bgcolor='rgba(240, 240, 240, 0)')
+    fig.update_yaxes(autorange='reversed')
+    fig.update_xaxes(range=[0.5, len(summary) + 0.5], dtick=1)
+    st.plotly_chart(fig, use_container_width=True)
+
 # 4. 비상소화장치 위치 제안 페이지 - 화재건수탭: 동별 화재발생 건수
 @st.cache_data
 def visualize_fire_counts_by_selected_year(df, selected_year):